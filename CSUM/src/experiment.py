@@ -23,11 +23,27 @@ def build_structured_topology(num_planes, sats_per_plane):
     return G
 
 
+def claim_output_dir(output_dir):
+    """Create and return output_dir, appending a counter if another run already claimed it."""
+    candidate, suffix = output_dir, 1
+    while True:
+        try:
+            os.makedirs(candidate)
+            return candidate
+        except FileExistsError:
+            candidate = f"{output_dir}_{suffix}"
+            suffix += 1
+
+
 MIN_DELAY_MS = 0
 MAX_DELAY_MS = 24 * 60 * 60 * 1000
 
 
-def simulate_updates(topology_configs=[(6, 8), (10, 10), (12, 12)], num_updates=5):
+def simulate_updates(
+    topology_configs=[(6, 8), (10, 10), (12, 12)], num_updates=5, seed=None
+):
+    if seed is not None:
+        np.random.seed(seed)
     results = {}
 
     for num_planes, sats_per_plane in topology_configs:
@@ -38,8 +54,8 @@ def simulate_updates(topology_configs=[(6, 8), (10, 10), (12, 12)], num_updates=
         G = build_structured_topology(num_planes, sats_per_plane)
         # 2) Instantiate one CubeSat per node
         gs = GroundStation("GS")
-        seed = gs.generate_random_token(32)
-        hashchain = gs.create_hashchain(seed, num_updates + num_sats + 10)
+        chain_seed = gs.generate_random_token(32)
+        hashchain = gs.create_hashchain(chain_seed, num_updates + num_sats + 10)
         initial_token = hashchain[-1]
         shared_secret = gs.generate_random_token(32)
         for n in G.nodes():
@@ -51,6 +67,7 @@ def simulate_updates(topology_configs=[(6, 8), (10, 10), (12, 12)], num_updates=
             "node_count": num_sats,
             "update_rounds": num_updates,
             "latency_model": "normal_15ms_std3",
+            "seed": seed,
             "topology_type": f"structured_{num_planes}x{sats_per_plane}",
             "edges": list(map(list, G.edges())),
             "nodes": {str(n): {"neighbors": list(G.neighbors(n))} for n in G.nodes()},
@@ -116,26 +133,227 @@ def simulate_updates(topology_configs=[(6, 8), (10, 10), (12, 12)], num_updates=
                         ]
                     )
                 ),
-                "avg_retries_per_event": None,  # compute if you track retries elsewhere
-                "max_retries": None,
-                "packet_drop_rate": None,
-                "redundant_transmissions": None,
+                # One attempt per CubeSat and nothing is dropped on this path
+                "avg_retries_per_event": 0.0,
+                "max_retries": 0,
+                "packet_drop_rate": 0.0,
+                "redundant_transmissions": 0,
             }
         )
 
-        # --- Write out JSON ---
-        output_dir = (
-            f"results/exp_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{num_sats}nodes"
-        )
-        os.makedirs(output_dir, exist_ok=True)
-        with open(os.path.join(output_dir, "experiment_data.json"), "w") as f:
-            json.dump(experiment_data, f, indent=2)
+        output_dir = write_experiment(experiment_data)
+        results[num_sats] = experiment_data["avg_propagation_time"]
+        print(f"Results written to {output_dir}/experiment_data.json")
+
+    return results
 
+
+def simulate_updates_vectorized(
+    topology_configs=[(6, 8), (10, 10), (12, 12)],
+    num_updates=5,
+    seed=None,
+    drop_probability=0.0,
+    max_retries=3,
+):
+    """simulate_updates with every per-CubeSat draw made as one array per round.
+
+    Each CubeSat's token is an index into the hashchain, so the ground
+    station's transmission token is computed once per round and checked once
+    per distinct token held, not once per satellite. An uplink is lost with
+    drop_probability and sent at most max_retries times in all (each attempt
+    is one event, as in CSUM-G); a CubeSat that loses every attempt keeps its
+    old token, so it rejects later updates. Only accepted uplinks are
+    token_valid, and dropped or rejected ones count towards packet_drop_rate.
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    results = {}
+
+    for num_planes, sats_per_plane in topology_configs:
+        print(num_planes, sats_per_plane)
+        experiment_data = _run_vectorized(
+            num_planes, sats_per_plane, num_updates, seed, drop_probability, max_retries
+        )
+        output_dir = write_experiment(experiment_data)
+        results[experiment_data["node_count"]] = experiment_data["avg_propagation_time"]
         print(f"Results written to {output_dir}/experiment_data.json")
 
+    return results
+
+
+def simulate_scenario(scenario):
+    """Run the baseline on a head_to_head.make_scenario() dict and return its experiment_data.
+
+    The scenario fixes the topology and failed links (recorded only, CSUM
+    uplinks to every CubeSat directly), the hashchain seed, shared secret,
+    link latency, drop rate and every CubeSat's wait for a ground pass.
+    """
+    np.random.seed(scenario["seed"])
+    num_planes, sats_per_plane = scenario["num_planes"], scenario["sats_per_plane"]
+    print(num_planes, sats_per_plane)
+    experiment_data = _run_vectorized(
+        num_planes,
+        sats_per_plane,
+        scenario["updates"],
+        scenario["seed"],
+        scenario["drop_probability"],
+        scenario["max_retries"],
+        latency_ms=tuple(1000 * x for x in scenario["latency_s"]),
+        chain_seed=scenario["chain_seed"],
+        shared_secret=scenario["shared_secret"],
+        load_delay_s=np.asarray(scenario["load_delay_s"]),
+        failed_links=scenario["failed_links"],
+    )
+    output_dir = write_experiment(experiment_data)
+    print(f"Results written to {output_dir}/experiment_data.json")
+    return experiment_data
+
+
+def _run_vectorized(
+    num_planes,
+    sats_per_plane,
+    num_updates,
+    seed,
+    drop_probability,
+    max_retries,
+    latency_ms=(15, 3),
+    chain_seed=None,
+    shared_secret=None,
+    load_delay_s=None,
+    failed_links=(),
+):
+    num_sats = num_planes * sats_per_plane
+    G = build_structured_topology(num_planes, sats_per_plane)
+    G.remove_edges_from(failed_links)
+    gs = GroundStation("GS")
+    hashchain = gs.create_hashchain(
+        chain_seed or gs.generate_random_token(32), num_updates + num_sats + 10
+    )
+    shared_secret = shared_secret or gs.generate_random_token(32)
+    token_index = np.full(num_sats, len(hashchain) - 1)
+
+    experiment_data = {
+        "timestamp": datetime.now().isoformat(),
+        "node_count": num_sats,
+        "update_rounds": num_updates,
+        "latency_model": f"normal_{latency_ms[0]:g}ms_std{latency_ms[1]:g}"
+        + (f"_drop{drop_probability:g}" if drop_probability else ""),
+        "seed": seed,
+        "topology_type": f"structured_{num_planes}x{sats_per_plane}",
+        "edges": list(map(list, G.edges())),
+        "disabled_edges": [list(edge) for edge in failed_links],
+        "nodes": {str(n): {"neighbors": list(G.neighbors(n))} for n in G.nodes()},
+        "events": [],
+        "successful_nodes_per_round": [],
+    }
+    start_time = time.time()
+    delivered_latencies = []
+    attempts_total = retry_sum = drops = redundant = max_retry = 0
+
+    for i in range(1, num_updates + 1):
+        gs.current_token = hashchain[-(i + 1)]
+        gs.previous_token = hashchain[-i]
+        version = 1.3 + i * 0.1
+        software_update = f"Firmware update v{version:.1f}"
+        tx_token = gs.send_update(software_update)
+
+        if load_delay_s is None:
+            wait_s = np.random.uniform(MIN_DELAY_MS, MAX_DELAY_MS, num_sats) / 1000.0
+        else:
+            wait_s = load_delay_s[i - 1]
+        # max_retries is the total number of attempts, as in CSUM-G
+        max_attempts = max(1, max_retries)
+        link_latency_s = (
+            np.maximum(0, np.random.normal(*latency_ms, (num_sats, max_attempts)))
+            / 1000.0
+        )
+        lost = np.random.random_sample((num_sats, max_attempts)) < drop_probability
+        reached = ~lost.all(axis=1)
+        # Attempts made: up to the first delivered one, or all of them
+        attempts = np.where(reached, np.argmin(lost, axis=1) + 1, max_attempts)
+        # Latency of attempt k is the load delay plus every link delay up to k
+        latency = wait_s[:, None] + np.cumsum(link_latency_s, axis=1)
+
+        # CubeSats holding the same token verify the same way: check each once
+        accepted = np.zeros(num_sats, dtype=bool)
+        for index in np.unique(token_index[reached]):
+            holders = reached & (token_index == index)
+            probe = CubeSat(hashchain[index], shared_secret)
+            probe.receive_update(software_update, tx_token)
+            if probe.token != hashchain[index]:
+                accepted[holders] = True
+                token_index[holders] = index - 1
+
+        now = time.time()
+        sat_ids, retries = np.nonzero(np.arange(max_attempts) < attempts[:, None])
+        # A delivered uplink only counts as valid if the token verified
+        valid = (
+            (retries == attempts[sat_ids] - 1) & reached[sat_ids] & accepted[sat_ids]
+        )
+        experiment_data["events"].extend(
+            {
+                "timestamp": now,
+                "sender": "GS",
+                "receiver": sat,
+                "latency": lat,
+                "token_valid": ok,
+                "version": f"{version:.1f}",
+                "retry": retry,
+            }
+            for sat, lat, ok, retry in zip(
+                sat_ids.tolist(),
+                latency[sat_ids, retries].tolist(),
+                valid.tolist(),
+                retries.tolist(),
+            )
+        )
+        delivered_latencies.append(latency[accepted, attempts[accepted] - 1])
+        attempts_total += len(sat_ids)
+        retry_sum += int(retries.sum())
+        max_retry = max(max_retry, int(retries.max(initial=0)))
+        drops += int(len(sat_ids) - valid.sum())
+        redundant += int((attempts > 1).sum())
+        experiment_data["successful_nodes_per_round"].append(int(accepted.sum()))
+
+    end_time = time.time()
+    latencies = np.concatenate(delivered_latencies)
+    experiment_data.update(
+        {
+            "start_time": start_time,
+            "end_time": end_time,
+            "avg_propagation_time": float(latencies.mean()) if len(latencies) else 0,
+            "max_propagation_time": float(latencies.max(initial=0)),
+            "unreachable_percent": 100.0
+            * (
+                1
+                - np.mean(
+                    [
+                        r / num_sats
+                        for r in experiment_data["successful_nodes_per_round"]
+                    ]
+                )
+            ),
+            "avg_retries_per_event": retry_sum / attempts_total,
+            "max_retries": max_retry,
+            "packet_drop_rate": 100 * drops / attempts_total,
+            "redundant_transmissions": redundant,
+        }
+    )
+    return experiment_data
+
+
+def write_experiment(experiment_data):
+    """Write experiment_data.json to a fresh results folder and return the folder."""
+    output_dir = claim_output_dir(
+        f"results/exp_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{experiment_data['node_count']}nodes"
+    )
+    with open(os.path.join(output_dir, "experiment_data.json"), "w") as f:
+        json.dump(experiment_data, f, indent=2)
+    return output_dir
+
 
 if __name__ == "__main__":
-    simulate_updates(
+    simulate_updates_vectorized(
         [
             (2, 3),
             (3, 4),
@@ -1,119 +1,217 @@
-from collections import defaultdict
-import os, json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import os, json, sys
 import pandas as pd
 
-extended_rows = []
-results_dir = "results"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from ColumnarStore import COLUMNS_DIR, META_FILE, ColumnarExperiment, has_columnar
+from EventLog import read_events
 
-for folder in os.listdir(results_dir):
-    folder_path = os.path.join(results_dir, folder)
+results_dir = "results"
+# Per-experiment summary rows, keyed by folder and the header's mtime/size
+index_file = os.path.join(results_dir, ".summary_index.json")
+# Bump whenever the summary row logic changes, so rows cached by older code are rebuilt
+INDEX_VERSION = 3
+# Below this many uncached folders a process pool costs more than it saves
+PARALLEL_THRESHOLD = 8
+
+
+def summarize_columnar(folder_path):
+    """Summary row from a columnar store, reading only the header and the columns it needs."""
+    store = ColumnarExperiment(folder_path)
+    data = dict(store.meta)
+    if "failed_token_attempts" not in data:
+        data.update(store.event_stats())
+    return _summary_row(data, store.max_hops())
+
+
+def summarize_experiment(folder_path):
+    """Parse one experiment folder into its summary row."""
+    if has_columnar(folder_path):
+        return summarize_columnar(folder_path)
     json_file = os.path.join(folder_path, "experiment_data.json")
-    if os.path.isfile(json_file):
-        with open(json_file, "r") as f:
-            data = json.load(f)
-
-        topology = data.get("topology_type")
-        nodes = data.get("node_count")
-        edges = len(data.get("edges", [])) - len(data.get("disabled_edges", []))
-        avg_time = round(data.get("avg_propagation_time", 0), 2)
-
-        # Max hops
-        max_hops = 0
-        received_nodes = 0
-        total_hops = 0
-        for node in data.get("nodes", {}).values():
-            hist = node.get("update_history", [])
-            if hist:
-                hop = hist[-1].get("hops")
-                if hop is not None:
-                    max_hops = max(max_hops, hop)
-                    total_hops += hop
-                    received_nodes += 1
-
-        # Retry stats
-        retries = [e["retry"] for e in data["events"]]
-        avg_retries = sum(retries) / len(retries) if retries else 0
-
-        # Redundant messages
-        from collections import Counter
-
-        target_counts = Counter((e["receiver"], e["version"]) for e in data["events"])
-        redundant_attempts = sum(
-            1 for (_, v), count in target_counts.items() if count > 1
-        )
-
-        # Malicious token count
-        malicious_count = sum(1 for e in data["events"] if e.get("possibly_malicious"))
-
+    with open(json_file, "r") as f:
+        data = json.load(f)
+
+    # Max hops of the last round, or the run's max if the header has no per-node history
+    max_hops = 0 if "nodes" in data else data.get("max_hops", 0)
+    for node in data.get("nodes", {}).values():
+        hist = node.get("update_history", [])
+        if hist:
+            hop = hist[-1].get("hops")
+            if hop is not None:
+                max_hops = max(max_hops, hop)
+
+    # Runs with online metrics already carry the event-derived stats
+    if "failed_token_attempts" not in data:
+        events = data.get("events")
+        if events is None:
+            # Streamed runs keep their events as NDJSON next to the header; a
+            # crashed run's last line may be cut short, which read_events skips
+            events = read_events(folder_path)
+        data.update(event_stats(events))
+
+    return _summary_row(data, max_hops)
+
+
+def event_stats(events):
+    """Retry, redundancy, malicious and failed-token counts folded over an event stream in one pass."""
+    count = retry_sum = malicious = failed = 0
+    target_counts = Counter()
+    for e in events:
+        count += 1
+        retry_sum += e["retry"]
+        target_counts[(e["receiver"], e["version"])] += 1
+        if e.get("possibly_malicious"):
+            malicious += 1
         # Packet drop estimate (token_valid = false and not malicious)
-        failed_token_attempts = sum(
-            1
-            for e in data["events"]
-            if not e["token_valid"] and not e.get("possibly_malicious")
-        )
-
-        success_rate = 100 - data.get("unreachable_percent", 0)
-
-        extended_rows.append(
-            {
-                "Topology": topology,
-                "Nodes": nodes,
-                "Edges": edges,
-                "Average Time (s)": avg_time,
-                "Max Hops": max_hops,
-                "Success Rate (%)": round(success_rate),
-                "Average Retries": round(avg_retries, 2),
-                "Max Propagation Time (s)": round(
-                    data.get("max_propagation_time", 0), 3
-                ),
-                "Redundant Messages": redundant_attempts,
-                "Malicious Tokens": malicious_count,
-                "Failed Token Attempts": failed_token_attempts,
-                "Average Degree": round(data.get("avg_node_degree", 0), 2),
-                "Diameter": data.get("graph_diameter"),
-                "Isolated Nodes": data.get("num_isolated", 0),
-            }
-        )
-
-extended_df = pd.DataFrame(extended_rows)
-extended_df["Config"] = extended_df["Topology"].str.replace("structured_", "")
-extended_df.drop(columns=["Topology"], inplace=True)
-extended_df.sort_values(by="Nodes", inplace=True)
-
-print(extended_df.to_string(index=False))
-extended_df.to_csv("experiment_summary.csv", index=False)
-
-import matplotlib.pyplot as plt
-
-# extended_df.plot(x="Nodes", y="Avg Time (s)", kind="line", marker="o")
-# plt.title("Average Propagation Time vs. Number of Nodes")
-# plt.grid(True)
-# plt.savefig("propagation_vs_nodes.png")
-fig, axs = plt.subplots(2, 3, figsize=(18, 10))
-# fig.suptitle("CubeSat Software Update Metrics vs. Node Count", fontsize=20)
-
-metrics = [
-    ("Average Time (s)", "Average Propagation Time"),
-    ("Max Hops", "Maximum Hops"),
-    ("Average Retries", "Average Retries per Event"),
-    ("Redundant Messages", "Redundant Messages"),
-    ("Failed Token Attempts", "Failed Token Attempts"),
-    ("Malicious Tokens", "Malicious Tokens Detected"),
-]
-
-
-# Plot each metric
-for ax, (col, title) in zip(axs.flatten(), metrics):
-    ax.plot(extended_df["Nodes"], extended_df[col])
-    ax.set_title(title, fontsize=26)
-    ax.set_xlabel("Number of Nodes", fontsize=20)
-    ax.set_ylabel(col, fontsize=20)
-    ax.tick_params(axis="both", labelsize=18)
-    ax.grid(True)
-
-# Hide unused subplots if any
-for i in range(len(metrics), len(axs.flatten())):
-    axs.flatten()[i].axis("off")
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.93], h_pad=3.0)
-plt.savefig("combined_metrics.pdf")
+        elif not e["token_valid"]:
+            failed += 1
+    return {
+        "avg_retries_per_event": retry_sum / count if count else 0,
+        "redundant_transmissions": sum(1 for c in target_counts.values() if c > 1),
+        "malicious_tokens": malicious,
+        "failed_token_attempts": failed,
+    }
+
+
+def _summary_row(data, max_hops):
+    topology = data.get("topology_type")
+    nodes = data.get("node_count")
+    # Columnar headers keep only the counts of the edge lists
+    edges = data.get("edges_count", len(data.get("edges", []))) - data.get(
+        "disabled_edges_count", len(data.get("disabled_edges", []))
+    )
+    avg_time = round(data.get("avg_propagation_time", 0), 2)
+    avg_retries = data["avg_retries_per_event"]
+    success_rate = 100 - data.get("unreachable_percent", 0)
+
+    return {
+        "Topology": topology,
+        "Nodes": nodes,
+        "Edges": edges,
+        "Average Time (s)": avg_time,
+        "Max Hops": max_hops,
+        "Success Rate (%)": round(success_rate),
+        "Average Retries": round(avg_retries, 2),
+        "Max Propagation Time (s)": round(data.get("max_propagation_time", 0), 3),
+        "P95 Propagation Time (s)": (
+            round(data["p95_propagation_time"], 3)
+            if "p95_propagation_time" in data
+            else None
+        ),
+        "Redundant Messages": data["redundant_transmissions"],
+        "Malicious Tokens": data["malicious_tokens"],
+        "Failed Token Attempts": data["failed_token_attempts"],
+        "Average Degree": round(data.get("avg_node_degree", 0), 2),
+        "Diameter": data.get("graph_diameter"),
+        "Isolated Nodes": data.get("num_isolated", 0),
+    }
+
+
+def _stamp(folder_path):
+    # The header is rewritten (os.replace) when a run finishes, so this changes too
+    if has_columnar(folder_path):
+        stat = os.stat(os.path.join(folder_path, COLUMNS_DIR, META_FILE))
+        return ["columnar", stat.st_mtime_ns, stat.st_size]
+    stat = os.stat(os.path.join(folder_path, "experiment_data.json"))
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load_index():
+    """Cached rows by folder; an index from another INDEX_VERSION counts as empty."""
+    try:
+        with open(index_file, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return {}
+    return index.get("rows", {})
+
+
+def save_index(index):
+    tmp_file = index_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({"version": INDEX_VERSION, "rows": index}, f)
+    os.replace(tmp_file, index_file)
+
+
+def load_summaries(workers=None):
+    """Summary rows for every experiment, parsing only folders that are new or changed."""
+    index = load_index()
+    fresh, stale = {}, []
+    for folder in sorted(os.listdir(results_dir)):
+        folder_path = os.path.join(results_dir, folder)
+        if not (
+            os.path.isfile(os.path.join(folder_path, "experiment_data.json"))
+            or has_columnar(folder_path)
+        ):
+            continue
+        stamp = _stamp(folder_path)
+        entry = index.get(folder)
+        if entry is not None and entry["stamp"] == stamp:
+            fresh[folder] = entry
+        else:
+            stale.append((folder, stamp))
+
+    folder_paths = [os.path.join(results_dir, folder) for folder, _ in stale]
+    if len(stale) >= PARALLEL_THRESHOLD and workers != 1:
+        # Cold start: every header is an independent JSON parse
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(summarize_experiment, folder_paths, chunksize=4))
+    else:
+        rows = [summarize_experiment(path) for path in folder_paths]
+    for (folder, stamp), row in zip(stale, rows):
+        fresh[folder] = {"stamp": stamp, "row": row}
+
+    # Deleted folders drop out of the index as well
+    if stale or len(fresh) != len(index):
+        save_index(fresh)
+    print(f"{len(stale)} experiment(s) parsed, {len(fresh) - len(stale)} from cache")
+    return [fresh[folder]["row"] for folder in sorted(fresh)]
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    extended_df = pd.DataFrame(load_summaries(workers))
+    extended_df["Config"] = extended_df["Topology"].str.replace("structured_", "")
+    extended_df.drop(columns=["Topology"], inplace=True)
+    extended_df.sort_values(by="Nodes", kind="stable", inplace=True)
+
+    print(extended_df.to_string(index=False))
+    extended_df.to_csv("experiment_summary.csv", index=False)
+
+    import matplotlib.pyplot as plt
+
+    # extended_df.plot(x="Nodes", y="Avg Time (s)", kind="line", marker="o")
+    # plt.title("Average Propagation Time vs. Number of Nodes")
+    # plt.grid(True)
+    # plt.savefig("propagation_vs_nodes.png")
+    fig, axs = plt.subplots(2, 3, figsize=(18, 10))
+    # fig.suptitle("CubeSat Software Update Metrics vs. Node Count", fontsize=20)
+
+    metrics = [
+        ("Average Time (s)", "Average Propagation Time"),
+        ("Max Hops", "Maximum Hops"),
+        ("Average Retries", "Average Retries per Event"),
+        ("Redundant Messages", "Redundant Messages"),
+        ("Failed Token Attempts", "Failed Token Attempts"),
+        ("Malicious Tokens", "Malicious Tokens Detected"),
+    ]
+
+    # Plot each metric
+    for ax, (col, title) in zip(axs.flatten(), metrics):
+        ax.plot(extended_df["Nodes"], extended_df[col])
+        ax.set_title(title, fontsize=26)
+        ax.set_xlabel("Number of Nodes", fontsize=20)
+        ax.set_ylabel(col, fontsize=20)
+        ax.tick_params(axis="both", labelsize=18)
+        ax.grid(True)
+
+    # Hide unused subplots if any
+    for i in range(len(metrics), len(axs.flatten())):
+        axs.flatten()[i].axis("off")
+
+    plt.tight_layout(rect=[0, 0.03, 1, 0.93], h_pad=3.0)
+    plt.savefig("combined_metrics.pdf")
@@ -0,0 +1,152 @@
+import hashlib, hmac, mmap, os, struct
+from SoftwareUpdate import SoftwareUpdate
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MANIFEST_PREFIX = b"CSUMG-CHUNKED|"
+# image size, chunk size, chunk count
+MANIFEST_FIELDS = struct.Struct(">QII")
+
+
+def leaf_hash(data):
+    # Domain-separate leaves from inner nodes so a node can't pose as a chunk
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def verify_chunk(root, num_chunks, index, data, proof):
+    """Check one chunk against a Merkle root using its audit path."""
+    if not 0 <= index < num_chunks:
+        return False
+    value = leaf_hash(data)
+    proof = iter(proof)
+    width = num_chunks
+    while width > 1:
+        sibling = index ^ 1
+        # The last node of an odd level has no sibling and is carried up as is
+        if sibling < width:
+            sibling_hash = next(proof, None)
+            if sibling_hash is None:
+                return False
+            if index & 1:
+                value = node_hash(sibling_hash, value)
+            else:
+                value = node_hash(value, sibling_hash)
+        index >>= 1
+        width = (width + 1) // 2
+    return next(proof, None) is None and hmac.compare_digest(value, root)
+
+
+class ChunkedUpdate(SoftwareUpdate):
+    """Firmware image split into chunks under a Merkle root.
+
+    The hashchain and cluster tokens authenticate only the small manifest
+    (`data`: root, image size, chunk size, chunk count). Each chunk then
+    travels with its audit path, so a CubeSat can verify and forward it as
+    soon as it arrives without holding the whole image.
+    """
+
+    def __init__(self, root, size, chunk_size, num_chunks, version=None, levels=None):
+        self.root = root
+        self.size = size
+        self.chunk_size = chunk_size
+        self.num_chunks = num_chunks
+        self._levels = levels
+        self._source = None
+        super().__init__(
+            MANIFEST_PREFIX + root + MANIFEST_FIELDS.pack(size, chunk_size, num_chunks),
+            version=version,
+        )
+
+    @classmethod
+    def from_manifest(cls, manifest, version=None):
+        """Rebuild the receiver-side view of an update from its manifest bytes."""
+        if not manifest.startswith(MANIFEST_PREFIX):
+            raise ValueError("Not a chunked update manifest")
+        body = manifest[len(MANIFEST_PREFIX) :]
+        root, fields = body[:32], body[32:]
+        size, chunk_size, num_chunks = MANIFEST_FIELDS.unpack(fields)
+        return cls(root, size, chunk_size, num_chunks, version=version)
+
+    @classmethod
+    def from_bytes(cls, image, chunk_size=DEFAULT_CHUNK_SIZE, version=None):
+        """Chunk an in-memory image."""
+        update = cls._build(memoryview(image), len(image), chunk_size, version)
+        update._source = memoryview(image)
+        return update
+
+    @classmethod
+    def from_file(cls, path, chunk_size=DEFAULT_CHUNK_SIZE, version=None):
+        """Chunk an image on disk through a read-only memory map."""
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            if size == 0:
+                return cls.from_bytes(b"", chunk_size, version)
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        update = cls._build(source, size, chunk_size, version)
+        update._source = source
+        return update
+
+    @classmethod
+    def _build(cls, source, size, chunk_size, version):
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        num_chunks = max(1, -(-size // chunk_size))
+        level = [
+            leaf_hash(source[i * chunk_size : (i + 1) * chunk_size])
+            for i in range(num_chunks)
+        ]
+        levels = [level]
+        while len(level) > 1:
+            level = [
+                node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                for i in range(0, len(level), 2)
+            ]
+            levels.append(level)
+        return cls(level[0], size, chunk_size, num_chunks, version, levels)
+
+    def chunk(self, index):
+        """Read one chunk from the backing image."""
+        if self._source is None:
+            raise ValueError("Update has no local image to read chunks from")
+        return bytes(
+            self._source[index * self.chunk_size : (index + 1) * self.chunk_size]
+        )
+
+    def proof(self, index):
+        """Audit path of sibling hashes from a chunk's leaf up to the root."""
+        if self._levels is None:
+            raise ValueError("Update has no Merkle tree to build proofs from")
+        path = []
+        for level in self._levels[:-1]:
+            if index ^ 1 < len(level):
+                path.append(level[index ^ 1])
+            index >>= 1
+        return path
+
+    def chunks(self):
+        """Stream (index, data, proof) for every chunk in order."""
+        for index in range(self.num_chunks):
+            yield index, self.chunk(index), self.proof(index)
+
+    def verify_chunk(self, index, data, proof):
+        return verify_chunk(self.root, self.num_chunks, index, data, proof)
+
+    def close(self):
+        if isinstance(self._source, mmap.mmap):
+            self._source.close()
+        self._source = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return f"<chunked update {self.digest[:10]}... ({self.num_chunks} x {self.chunk_size} bytes)>"
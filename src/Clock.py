@@ -0,0 +1,28 @@
+import time
+
+
+class WallClock:
+    """Clock source backed by the host's real time."""
+
+    def time(self):
+        return time.time()
+
+
+class SimulatedClock:
+    """Clock source that only moves when a simulation advances it."""
+
+    def __init__(self, start_time=0.0):
+        self._now = start_time
+
+    def time(self):
+        return self._now
+
+    def advance(self, delta):
+        """Move the clock forward by delta seconds."""
+        self.advance_to(self._now + delta)
+
+    def advance_to(self, timestamp):
+        """Move the clock forward to an absolute timestamp."""
+        if timestamp < self._now:
+            raise ValueError("Simulated clock cannot move backwards")
+        self._now = timestamp
@@ -0,0 +1,199 @@
+import hashlib
+import numpy as np
+from Clock import WallClock
+from CubeSat import CubeSat, cluster_hmac_states
+from tokens import to_bytes
+from UpdateLog import UpdateLog
+
+
+class ClusterState:
+    """Struct-of-arrays state of a whole cluster, with CubeSat views created on demand.
+
+    Every CubeSat holds a link of one shared hashchain, so its token is kept
+    as an index into the chain (read through the chain itself, so a pebbled
+    HashChain stays pebbled); dedup of the round's update is one flag per
+    node, with earlier updates in one bounded UpdateLog shared by all nodes,
+    and the per-round update history is three (node x round) arrays:
+    received flags, hop counts (-1 if never) and arrival times (float32,
+    NaN if never). That is 5 bytes per node plus 7 per node per round.
+    state[i] returns a CubeSatView backed by these arrays.
+    """
+
+    def __init__(
+        self, num_nodes, rounds, hashchain=None, shared_secret=None, clock=None
+    ):
+        self.num_nodes = num_nodes
+        self.rounds = rounds
+        self.round = -1
+        self.received = np.zeros((num_nodes, rounds), dtype=bool)
+        self.hops = np.full((num_nodes, rounds), -1, dtype=np.int16)
+        self.time_received = np.full((num_nodes, rounds), np.nan, dtype=np.float32)
+        # Dedup of the round's update, and of earlier rounds' updates
+        self.holds = np.zeros(num_nodes, dtype=bool)
+        self.current_digest = None
+        self.current_version = None
+        self.past_updates = UpdateLog(CubeSat.UPDATE_LOG_WINDOW)
+        self.chunk_progress = {}
+        self.token_lifetime = CubeSat.TOKEN_LIFETIME
+        self.clock = clock if clock is not None else WallClock()
+        self.hashchain = hashchain
+        self.token_index = None
+        if hashchain is not None:
+            self.token_index = np.full(num_nodes, len(hashchain) - 1, dtype=np.int32)
+        self.shared_secret = shared_secret
+        if shared_secret is not None:
+            self.cluster_inner, self.cluster_outer = cluster_hmac_states(shared_secret)
+
+    def __len__(self):
+        return self.num_nodes
+
+    def __getitem__(self, node):
+        return CubeSatView(self, node)
+
+    def start_round(self, software_update=None):
+        """Open the next history column and reset the dedup flags for a new update."""
+        self.round += 1
+        if self.current_digest is not None:
+            self.past_updates.add(self.current_digest, self.current_version)
+        self.current_digest = software_update.digest if software_update else None
+        self.current_version = software_update.version if software_update else None
+        self.holds[:] = False
+
+    def token_of(self, node):
+        return to_bytes(self.hashchain[int(self.token_index[node])])
+
+    def set_token(self, node, token):
+        """Move node to token, a link that hashes down to the one it holds now."""
+        token = to_bytes(token)
+        held = self.token_of(node)
+        value = token
+        for steps in range(CubeSat.MAX_CATCH_UP_STEPS + 1):
+            if value == held:
+                self.token_index[node] -= steps
+                return
+            value = hashlib.sha256(value).digest()
+        raise ValueError("Token is not a later link of the cluster hashchain")
+
+    def record(self, node, time_received, hops):
+        """Mark node as holding the round's update."""
+        self.received[node, self.round] = True
+        self.time_received[node, self.round] = time_received
+        self.hops[node, self.round] = hops
+
+    def hops_now(self, node):
+        hops = int(self.hops[node, self.round])
+        return hops if hops >= 0 else None
+
+    def successful(self, round_index=None):
+        """Number of nodes that hold the update of a round (default: the current one)."""
+        column = self.round if round_index is None else round_index
+        return int(self.received[:, column].sum())
+
+    def update_history(self, node):
+        """The node's history as the list of dicts experiment_data.json stores."""
+        return [
+            {
+                "received": bool(self.received[node, r]),
+                "time_received": (
+                    None
+                    if np.isnan(self.time_received[node, r])
+                    else float(self.time_received[node, r])
+                ),
+                "hops": int(self.hops[node, r]) if self.hops[node, r] >= 0 else None,
+            }
+            for r in range(self.round + 1)
+        ]
+
+    def history_arrays(self):
+        """(node x completed round) arrays in the ColumnarStore layout."""
+        rounds = self.round + 1
+        return {
+            "received": self.received[:, :rounds],
+            "time_received": self.time_received[:, :rounds].astype(np.float64),
+            "hops": self.hops[:, :rounds].astype(np.int32),
+        }
+
+    def nbytes(self):
+        arrays = [self.received, self.hops, self.time_received, self.holds]
+        if self.token_index is not None:
+            arrays.append(self.token_index)
+        return sum(a.nbytes for a in arrays)
+
+
+class _NodeUpdateLog:
+    """update_log of one node: the round's dedup flag; earlier rounds' updates count as seen."""
+
+    __slots__ = ("_state", "_node")
+
+    def __init__(self, state, node):
+        self._state = state
+        self._node = node
+
+    def seen(self, digest, version=None):
+        if digest == self._state.current_digest:
+            return bool(self._state.holds[self._node])
+        return self._state.past_updates.seen(digest, version)
+
+    def add(self, digest, version=None):
+        if digest == self._state.current_digest:
+            self._state.holds[self._node] = True
+
+    def __contains__(self, digest):
+        return self.seen(digest)
+
+    def clear(self):
+        self._state.holds[self._node] = False
+
+
+class CubeSatView(CubeSat):
+    """The CubeSat API over one node of a ClusterState; it holds no state of its own."""
+
+    def __init__(self, state, node):
+        self._state = state
+        self.id = node
+        self.clock = state.clock
+        self.TOKEN_LIFETIME = state.token_lifetime
+        self._shared_cluster_secret = state.shared_secret
+        self._cluster_inner = state.cluster_inner
+        self._cluster_outer = state.cluster_outer
+        self.update_log = _NodeUpdateLog(state, node)
+
+    @property
+    def token(self):
+        return self._state.token_of(self.id)
+
+    @token.setter
+    def token(self, token):
+        self._state.set_token(self.id, token)
+
+    @property
+    def chunk_progress(self):
+        return self._state.chunk_progress.setdefault(self.id, {})
+
+
+if __name__ == "__main__":
+    from GroundStation import GroundStation
+    from UpdateLog import retained_size
+
+    num_nodes, rounds = 10000, 50
+    ground_station = GroundStation("GS")
+    secret = ground_station.generate_random_token(32)
+    hashchain = ground_station.create_hashchain("seed", rounds + 1)
+    objects = [CubeSat(hashchain[-1], secret) for _ in range(num_nodes)]
+    # Shared chain links are counted once, as in the arrays
+    seen = set(map(id, hashchain))
+    # History as the JSON dicts scalability_experiment kept per node
+    history = [
+        [
+            {"received": True, "time_received": 0.01 * i, "hops": 3}
+            for i in range(rounds)
+        ]
+        for _ in range(num_nodes)
+    ]
+    object_bytes = retained_size(objects, seen) + retained_size(history, seen)
+    state = ClusterState(num_nodes, rounds, hashchain, secret)
+    print(
+        f"{num_nodes} CubeSats x {rounds} rounds: objects {object_bytes / num_nodes:,.0f} B/node, "
+        f"ClusterState {state.nbytes() / num_nodes:,.0f} B/node "
+        f"({state.nbytes() / (num_nodes * rounds):.2f} B/node/round)"
+    )
@@ -0,0 +1,253 @@
+import itertools, json, os, shutil
+import numpy as np
+from EventLog import HEADER_FILE, read_events
+
+COLUMNS_DIR = "columns"
+META_FILE = "meta.json"
+# Bits of the per-event flags column
+TOKEN_VALID = 1
+POSSIBLY_MALICIOUS = 2
+# Sender id recorded for transmissions straight from the ground station (CSUM runs)
+GROUND_STATION = -1
+
+EVENT_COLUMNS = {
+    "sender": np.int32,
+    "receiver": np.int32,
+    "latency": np.float64,
+    "retry": np.int8,
+    "flags": np.uint8,
+    "version": np.int16,
+    "timestamp": np.float64,
+}
+
+
+# Events parsed per batch while streaming them into the columns
+EVENT_BATCH = 65536
+# Header lists stored as (n, 2) int32 columns instead of in meta.json
+EDGE_LISTS = ("edges", "disabled_edges")
+
+
+def _event_batch(events, version_index):
+    """Column arrays for one batch of event dicts; new versions get the next index."""
+    for e in events:
+        version_index.setdefault(str(e["version"]), len(version_index))
+    return {
+        "sender": np.array(
+            [GROUND_STATION if e["sender"] == "GS" else e["sender"] for e in events],
+            dtype=EVENT_COLUMNS["sender"],
+        ),
+        "receiver": np.array(
+            [e["receiver"] for e in events], dtype=EVENT_COLUMNS["receiver"]
+        ),
+        "latency": np.array(
+            [e["latency"] for e in events], dtype=EVENT_COLUMNS["latency"]
+        ),
+        "retry": np.array(
+            [e.get("retry", 0) for e in events], dtype=EVENT_COLUMNS["retry"]
+        ),
+        "flags": np.array(
+            [
+                (TOKEN_VALID if e.get("token_valid", True) else 0)
+                | (POSSIBLY_MALICIOUS if e.get("possibly_malicious") else 0)
+                for e in events
+            ],
+            dtype=EVENT_COLUMNS["flags"],
+        ),
+        "version": np.array(
+            [version_index[str(e["version"])] for e in events],
+            dtype=EVENT_COLUMNS["version"],
+        ),
+        "timestamp": np.array(
+            [e["timestamp"] for e in events], dtype=EVENT_COLUMNS["timestamp"]
+        ),
+    }
+
+
+def _event_columns(events):
+    """Fixed-width column arrays for an iterable of event dicts, plus the version lookup table.
+
+    Events are consumed EVENT_BATCH at a time into arrays that double when
+    full, so a streamed events.ndjson never has to be held as dicts.
+    """
+    columns = {name: np.empty(0, dtype) for name, dtype in EVENT_COLUMNS.items()}
+    count = 0
+    version_index = {}
+    events = iter(events)
+    while True:
+        batch = list(itertools.islice(events, EVENT_BATCH))
+        if not batch:
+            break
+        arrays = _event_batch(batch, version_index)
+        end = count + len(batch)
+        if end > len(columns["sender"]):
+            capacity = max(end, 2 * len(columns["sender"]))
+            for name, column in columns.items():
+                grown = np.empty(capacity, column.dtype)
+                grown[:count] = column[:count]
+                columns[name] = grown
+        for name, array in arrays.items():
+            columns[name][count:end] = array
+        count = end
+    columns = {name: column[:count] for name, column in columns.items()}
+    # Versions are stored sorted, so remap the first-seen indices
+    versions = sorted(version_index)
+    remap = np.empty(len(versions), dtype=EVENT_COLUMNS["version"])
+    for i, version in enumerate(versions):
+        remap[version_index[version]] = i
+    columns["version"] = remap[columns["version"]] if count else columns["version"]
+    return columns, versions
+
+
+def _history_columns(nodes, rounds):
+    """(node x round) arrays of received flags, arrival times (NaN if never) and hops (-1 if never)."""
+    node_ids = sorted(nodes, key=int)
+    received = np.zeros((len(node_ids), rounds), dtype=bool)
+    time_received = np.full((len(node_ids), rounds), np.nan)
+    hops = np.full((len(node_ids), rounds), -1, dtype=np.int32)
+    for row, node_id in enumerate(node_ids):
+        for col, entry in enumerate(nodes[node_id]["update_history"]):
+            received[row, col] = entry["received"]
+            if entry["time_received"] is not None:
+                time_received[row, col] = entry["time_received"]
+            if entry["hops"] is not None:
+                hops[row, col] = entry["hops"]
+    return {"received": received, "time_received": time_received, "hops": hops}
+
+
+def write_columnar(output_dir, header, events, history=None):
+    """Write an experiment as .npy columns plus a slim JSON header under output_dir/columns.
+
+    The header keeps every scalar field; events, the per-node update history
+    and the edge lists move into arrays that can be memory-mapped one column
+    at a time. events may be any iterable and is consumed in batches.
+    history, if given, is the (node x round) arrays themselves (e.g. from
+    ClusterState.history_arrays()) and replaces the header's update_history.
+    """
+    nodes = header.get("nodes", {})
+    meta = {
+        k: v for k, v in header.items() if k not in ("nodes", "events", *EDGE_LISTS)
+    }
+    columns, meta["versions"] = _event_columns(events)
+    arrays = {f"events_{name}": column for name, column in columns.items()}
+    for name in EDGE_LISTS:
+        edges = np.array(header.get(name, []), dtype=np.int32).reshape(-1, 2)
+        arrays[f"topology_{name}"] = edges
+        meta[f"{name}_count"] = len(edges)
+    if history is None:
+        rounds = max(
+            (len(n.get("update_history", [])) for n in nodes.values()), default=0
+        )
+        if rounds:
+            history = _history_columns(nodes, rounds)
+    if history is not None:
+        arrays.update({f"history_{name}": a for name, a in history.items()})
+    meta["node_ids"] = (
+        sorted((int(n) for n in nodes))
+        if nodes or history is None
+        else list(range(len(history["received"])))
+    )
+    meta["columns"] = sorted(arrays)
+
+    # Build next to the final folder and swap it in, so readers never see half a store
+    target = os.path.join(output_dir, COLUMNS_DIR)
+    tmp_dir = target + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, name + ".npy"), array)
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_dir, target)
+    return target
+
+
+def has_columnar(output_dir):
+    return os.path.isfile(os.path.join(output_dir, COLUMNS_DIR, META_FILE))
+
+
+class ColumnarExperiment:
+    """Read-only view of a columnar experiment; columns are memory-mapped on first access."""
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, COLUMNS_DIR)
+        with open(os.path.join(self.path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self._columns = {}
+
+    def column(self, name):
+        if name not in self._columns:
+            if name not in self.meta["columns"]:
+                raise KeyError(name)
+            self._columns[name] = np.load(
+                os.path.join(self.path, name + ".npy"), mmap_mode="r"
+            )
+        return self._columns[name]
+
+    def events(self, name):
+        return self.column(f"events_{name}")
+
+    def history(self, name):
+        return self.column(f"history_{name}")
+
+    @property
+    def has_history(self):
+        return "history_hops" in self.meta["columns"]
+
+    def version_mask(self, version):
+        """Boolean event mask for one update version (as recorded, e.g. "1.3")."""
+        return self.events("version") == self.meta["versions"].index(str(version))
+
+    def event_stats(self):
+        """Retry, redundancy, malicious and failed-token counts straight from the columns."""
+        retry = self.events("retry")
+        flags = self.events("flags")
+        count = len(retry)
+        malicious = (flags & POSSIBLY_MALICIOUS) != 0
+        invalid = (flags & TOKEN_VALID) == 0
+        # A receiver is redundant for a version if it logged more than one attempt for it
+        pairs = self.events("receiver").astype(np.int64) * len(
+            self.meta["versions"]
+        ) + self.events("version")
+        _, pair_counts = np.unique(pairs, return_counts=True)
+        return {
+            "avg_retries_per_event": float(retry.mean()) if count else 0,
+            "redundant_transmissions": int((pair_counts > 1).sum()),
+            "malicious_tokens": int(malicious.sum()),
+            "failed_token_attempts": int((invalid & ~malicious).sum()),
+        }
+
+    def max_hops(self, round_index=-1):
+        if not self.has_history:
+            return 0
+        return max(0, int(self.history("hops")[:, round_index].max(initial=-1)))
+
+
+def convert_experiment(output_dir, history=None):
+    """Convert one results folder (inline events or events.ndjson) to the columnar layout."""
+    with open(os.path.join(output_dir, HEADER_FILE)) as f:
+        header = json.load(f)
+    events = header.pop("events", None)
+    if events is None:
+        # Streamed straight into the columns, never held as a list
+        events = read_events(output_dir) if header.get("events_file") else []
+    return write_columnar(output_dir, header, events, history)
+
+
+def convert_results(results_dir):
+    """Convert every experiment folder under results_dir; the JSON files are left in place."""
+    converted = []
+    for folder in sorted(os.listdir(results_dir)):
+        output_dir = os.path.join(results_dir, folder)
+        if os.path.isfile(os.path.join(output_dir, HEADER_FILE)):
+            convert_experiment(output_dir)
+            converted.append(output_dir)
+    return converted
+
+
+if __name__ == "__main__":
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for results_dir in ("results", os.path.join("CSUM", "results")):
+        path = os.path.join(repo_root, results_dir)
+        if os.path.isdir(path):
+            print(f"{results_dir}: converted {len(convert_results(path))} experiments")
@@ -1,99 +1,230 @@
-import hashlib, hmac, time
+import hashlib, hmac
+from Clock import WallClock
+from tokens import xor_bytes, to_bytes, to_hex
+from SoftwareUpdate import SoftwareUpdate
+from ChunkedUpdate import ChunkedUpdate
+from UpdateLog import UpdateLog
+
+
+def cluster_hmac_states(secret):
+    """HMAC-SHA256 keyed once as its inner and outer hash states (RFC 2104).
+
+    A message then costs two context copies, not a new HMAC object.
+    """
+    key = secret.encode()
+    if len(key) > hashlib.sha256().block_size:
+        key = hashlib.sha256(key).digest()
+    key = key.ljust(hashlib.sha256().block_size, b"\0")
+    inner = hashlib.sha256(bytes(b ^ 0x36 for b in key))
+    outer = hashlib.sha256(bytes(b ^ 0x5C for b in key))
+    return inner, outer
 
 
 class CubeSat:
     _counter = 0
+    # Seconds a broadcast token stays valid after it is issued
+    TOKEN_LIFETIME = 5
+    # Most hashchain links a catch-up will walk before giving up
+    MAX_CATCH_UP_STEPS = 10000
+    # Updates the default update_log remembers by digest
+    UPDATE_LOG_WINDOW = 64
 
-    def __init__(self, initial_token, shared_secret):
-        self.token = initial_token
+    def __init__(self, initial_token, shared_secret, clock=None, update_log=None):
+        self.token = to_bytes(initial_token)
         self.shared_cluster_secret = shared_secret
+        self.clock = clock if clock is not None else WallClock()
         self.id = CubeSat._counter
         CubeSat._counter += 1
-        self.update_log = set()
+        # Bounded dedup of recent updates (UpdateLog or BloomUpdateLog)
+        self.update_log = (
+            update_log if update_log is not None else UpdateLog(self.UPDATE_LOG_WINDOW)
+        )
+        # Per accepted chunked update: one byte per chunk, set once it verifies
+        self.chunk_progress = {}
+
+    @property
+    def shared_cluster_secret(self):
+        return self._shared_cluster_secret
+
+    @shared_cluster_secret.setter
+    def shared_cluster_secret(self, secret):
+        self._shared_cluster_secret = secret
+        self._cluster_inner, self._cluster_outer = cluster_hmac_states(secret)
+
+    def _finish_cluster_hmac(self, inner):
+        outer = self._cluster_outer.copy()
+        outer.update(inner.digest())
+        return outer.digest()
 
-    def xor_strings(self, s1, s2):
-        """XOR two strings and return the result as a string."""
-        # Ensure both strings are of the same length
-        if len(s1) != len(s2):
-            raise ValueError("Both strings must have the same length")
+    def cluster_hmac(self, message):
+        """HMAC a cluster message with the shared secret from the precomputed key context."""
+        inner = self._cluster_inner.copy()
+        inner.update(message.encode())
+        return self._finish_cluster_hmac(inner)
 
-        # XOR each pair of characters from the two strings
-        result = [chr(ord(a) ^ ord(b)) for a, b in zip(s1, s2)]
+    def has_received(self, software_update):
+        """Check the update log for an update's (cached) digest."""
+        software_update = SoftwareUpdate.wrap(software_update)
+        return self.update_log.seen(software_update.digest, software_update.version)
 
-        # Convert the list of characters back into a string
-        return "".join(result)
+    @property
+    def token_hex(self):
+        """Current token as hex, for JSON output and logging."""
+        return to_hex(self.token)
 
     def receive_update(
         self, software_update, transmission_token, set_current_token=False
     ):
         """Receive an update from the ground station."""
         # extracted token = transmission_token XOR hash(software_update, token)
-        hmac_obj = hmac.new(
-            self.token.encode(), software_update.encode(), hashlib.sha256
-        )
-        expected_token = self.xor_strings(transmission_token, hmac_obj.hexdigest())
+        software_update = SoftwareUpdate.wrap(software_update)
+        hmac_obj = hmac.new(self.token, software_update.data, hashlib.sha256)
+        expected_token = xor_bytes(to_bytes(transmission_token), hmac_obj.digest())
         # Verify the extracted token by checking its hash against the current token
-        if hmac.compare_digest(
-            hashlib.sha256(expected_token.encode()).hexdigest(), self.token
-        ):
+        if hmac.compare_digest(hashlib.sha256(expected_token).digest(), self.token):
             self.token = expected_token
+            # Held from the uplink on, so relays don't send it back
+            self.update_log.add(software_update.digest, software_update.version)
+            self._accept_manifest(software_update)
             # print(f"[{expected_token[:10]}...] Update verified and accepted.")
             # print("Software update is verified")
+            return True
         else:
             print("Software update is not verified")
             # return software_update
+            return False
+
+    def catch_up_update(
+        self,
+        software_update,
+        transmission_token,
+        wrapped_token,
+        checkpoints=(),
+        max_steps=None,
+    ):
+        """Resynchronise after missed updates, then accept the current one.
+
+        wrapped_token is the link the ground station keyed this update with,
+        XORed with HMAC(our stale token, update) so it never travels in the
+        clear. Once unwrapped it must hash down to our stored token within
+        max_steps. Optional checkpoints (links between the two, nearest to our
+        token first) are adopted as soon as each one verifies, so an
+        interrupted catch-up keeps its progress.
+        """
+        if max_steps is None:
+            max_steps = self.MAX_CATCH_UP_STEPS
+        software_update = SoftwareUpdate.wrap(software_update)
+        report = {"verified": False, "steps": 0, "hash_count": 0}
+        previous_token = xor_bytes(
+            to_bytes(wrapped_token),
+            hmac.new(self.token, software_update.data, hashlib.sha256).digest(),
+        )
+
+        for link in [*map(to_bytes, checkpoints), previous_token]:
+            value = link
+            # A link we already hold takes zero steps
+            while not hmac.compare_digest(value, self.token):
+                if report["hash_count"] >= max_steps:
+                    return report
+                value = hashlib.sha256(value).digest()
+                report["hash_count"] += 1
+            self.token = link
+            report["steps"] = report["hash_count"]
+
+        # Back in sync: the ordinary path verifies and extracts the new token
+        report["verified"] = self.receive_update(software_update, transmission_token)
+        report["hash_count"] += 1
+        if report["verified"]:
+            report["steps"] += 1
+        return report
+
+    def _accept_manifest(self, software_update):
+        """Start tracking chunks once a chunked update's manifest is authenticated."""
+        if isinstance(software_update, ChunkedUpdate):
+            self.chunk_progress.setdefault(
+                software_update.digest, bytearray(software_update.num_chunks)
+            )
+
+    def receive_chunk(self, software_update, index, data, proof, sink=None):
+        """Verify one chunk of an accepted update; True means it may be forwarded at once."""
+        progress = self.chunk_progress.get(software_update.digest)
+        if progress is None:
+            # Manifest not authenticated yet, so there is no root to check against
+            return False
+        if not software_update.verify_chunk(index, data, proof):
+            print(f"[chunk {index}] WARNING: Chunk verification failed!")
+            return False
+        if sink is not None:
+            sink.seek(index * software_update.chunk_size)
+            sink.write(data)
+        progress[index] = 1
+        return True
+
+    def chunks_complete(self, software_update):
+        """Check whether every chunk of an accepted update has been verified."""
+        progress = self.chunk_progress.get(software_update.digest)
+        return progress is not None and all(progress)
 
     def broadcast_update(self, software_update, idrec):
         """Broadcast update received from ground station to CubeSat cluster"""
-        ts = int(time.time()) + 5
-        message = f"{software_update}|{self.id}|{idrec}|{ts}"
-        hmac_obj = hmac.new(
-            self.shared_cluster_secret.encode(),
-            message.encode(),
-            hashlib.sha256,
-        )
-        authenticated_update_token = hmac_obj.hexdigest()
+        software_update = SoftwareUpdate.wrap(software_update)
+        ts = int(self.clock.time()) + self.TOKEN_LIFETIME
+        # The token binds the update by its digest, not by re-MACing the payload
+        message = f"{software_update.digest}|{self.id}|{idrec}|{ts}"
+        authenticated_update_token = self.cluster_hmac(message)
 
         # broadcast transmission_token and software_update
         return software_update, authenticated_update_token, self.id, idrec, ts
 
+    def broadcast_update_batch(self, software_update, receiver_ids):
+        """Authenticated tokens for a whole neighbour set in one call.
+
+        Every token shares the digest, sender id and timestamp, so that prefix
+        is absorbed into a copy of the keyed context once and only each
+        receiver's suffix is hashed per token. Returns (update, ts, {receiver_id: token}).
+        """
+        software_update = SoftwareUpdate.wrap(software_update)
+        ts = int(self.clock.time()) + self.TOKEN_LIFETIME
+        prefix = self._cluster_inner.copy()
+        prefix.update(f"{software_update.digest}|{self.id}|".encode())
+        tokens = {}
+        for idrec in receiver_ids:
+            inner = prefix.copy()
+            inner.update(f"{idrec}|{ts}".encode())
+            tokens[idrec] = self._finish_cluster_hmac(inner)
+        return software_update, ts, tokens
+
     def receive_broadcast_update(
         self, software_update, authenticated_update_token, idsen, ts
     ):
         """Verify and accept broadcasted update from another CubeSat."""
 
         # Check if update is already received
-        update_hash = hashlib.sha256(software_update.encode()).hexdigest()
-        if update_hash in self.update_log:
+        software_update = SoftwareUpdate.wrap(software_update)
+        update_hash = software_update.digest
+        if self.update_log.seen(update_hash, software_update.version):
             return None
 
         # Check timestamp validity
-        if ts < time.time():
+        if ts < self.clock.time():
             raise ValueError("Token expired")
 
-        message = f"{software_update}|{idsen}|{self.id}|{ts}"
+        message = f"{update_hash}|{idsen}|{self.id}|{ts}"
         # Compute expected HMAC to verify authenticity
-        hmac_obj = hmac.new(
-            self.shared_cluster_secret.encode(),
-            message.encode(),
-            hashlib.sha256,
-        )
-        expected_token = hmac_obj.hexdigest()
+        expected_token = self.cluster_hmac(message)
 
         # Check if the received token matches the expected token
-        if hmac.compare_digest(expected_token, authenticated_update_token):
+        if hmac.compare_digest(expected_token, to_bytes(authenticated_update_token)):
             # print(f"[{authenticated_update_token[:10]}...] Update verified and accepted.")
-            self.update_log.add(update_hash)
-            new_ts = int(time.time()) + 5
+            self.update_log.add(update_hash, software_update.version)
+            self._accept_manifest(software_update)
+            new_ts = int(self.clock.time()) + self.TOKEN_LIFETIME
 
             def create_token_for(receiver_id):
-                msg = f"{software_update}|{self.id}|{receiver_id}|{new_ts}"
-                hmac_obj = hmac.new(
-                    self.shared_cluster_secret.encode(), msg.encode(), hashlib.sha256
-                )
+                msg = f"{update_hash}|{self.id}|{receiver_id}|{new_ts}"
                 return (
                     software_update,
-                    hmac_obj.hexdigest(),
+                    self.cluster_hmac(msg),
                     self.id,
                     receiver_id,
                     new_ts,
@@ -103,6 +234,40 @@ class CubeSat:
 
         else:
             print(
-                f"[{authenticated_update_token[:10]}...] WARNING: Update verification failed!"
+                f"[{to_hex(authenticated_update_token)[:10]}...] WARNING: Update verification failed!"
             )
             return None
+
+    def receive_broadcast_batch(self, software_update, broadcasts):
+        """Verify a burst of broadcasts of one update, given as (token, idsen, ts) tuples.
+
+        Returns one result per broadcast: True for the one that was accepted,
+        False if it failed verification or had expired, and None once the
+        update is held (later copies are not verified at all). Unlike
+        receive_broadcast_update, an expired token does not raise, so one
+        stale copy cannot abort the rest of the burst.
+        """
+        software_update = SoftwareUpdate.wrap(software_update)
+        update_hash = software_update.digest
+        prefix = self._cluster_inner.copy()
+        prefix.update(f"{update_hash}|".encode())
+        now = self.clock.time()
+        results = []
+        for authenticated_update_token, idsen, ts in broadcasts:
+            if self.update_log.seen(update_hash, software_update.version):
+                results.append(None)
+                continue
+            if ts < now:
+                results.append(False)
+                continue
+            inner = prefix.copy()
+            inner.update(f"{idsen}|{self.id}|{ts}".encode())
+            if hmac.compare_digest(
+                self._finish_cluster_hmac(inner), to_bytes(authenticated_update_token)
+            ):
+                self.update_log.add(update_hash, software_update.version)
+                self._accept_manifest(software_update)
+                results.append(True)
+            else:
+                results.append(False)
+        return results
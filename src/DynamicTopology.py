@@ -0,0 +1,199 @@
+import math
+import numpy as np
+from Topology import CSRTopology
+
+
+class ContactPlan:
+    """Contact windows of the inter-plane links of a polar plane/ring constellation.
+
+    Satellites move along their planes with the given orbital period;
+    inter-plane links are only held while both ends are below
+    `polar_cutoff` degrees of latitude (the usual cross-link shutdown over
+    the poles), and with `seam` the links between the last and first plane
+    (counter-rotating neighbours) are never up. Intra-plane ring links stay
+    up. Windows are sampled every `resolution` seconds.
+    """
+
+    def __init__(
+        self,
+        num_planes,
+        sats_per_plane,
+        period=5700.0,
+        inclination=86.4,
+        polar_cutoff=70.0,
+        phasing=0.5,
+        seam=False,
+        resolution=10.0,
+    ):
+        self.num_planes = num_planes
+        self.sats_per_plane = sats_per_plane
+        self.period = period
+        self.inclination = inclination
+        self.polar_cutoff = polar_cutoff
+        self.phasing = phasing
+        self.seam = seam
+        self.resolution = resolution
+
+    def latitude(self, nodes, t):
+        """Latitude in degrees of each node at time t (seconds since epoch of the plan)."""
+        plane, sat = nodes // self.sats_per_plane, nodes % self.sats_per_plane
+        # Adjacent planes are offset by `phasing` of a slot
+        phase = (
+            2
+            * math.pi
+            * (t / self.period + (sat + plane * self.phasing) / self.sats_per_plane)
+        )
+        return np.degrees(
+            np.arcsin(math.sin(math.radians(self.inclination)) * np.sin(phase))
+        )
+
+    def dynamic_links(self, u, v):
+        """Mask of the links (u, v arrays) whose state follows the contact windows."""
+        return u // self.sats_per_plane != v // self.sats_per_plane
+
+    def link_state(self, u, v, t):
+        """Up/down state at time t of the given inter-plane links."""
+        up = (np.abs(self.latitude(u, t)) < self.polar_cutoff) & (
+            np.abs(self.latitude(v, t)) < self.polar_cutoff
+        )
+        if self.seam and self.num_planes > 2:
+            plane_u, plane_v = u // self.sats_per_plane, v // self.sats_per_plane
+            up &= np.abs(plane_u - plane_v) != self.num_planes - 1
+        return up
+
+    def link_changes(self, u, v, start, end):
+        """Link up/down events in (start, end] as sorted (times, link indices, up) arrays."""
+        steps = start + self.resolution * np.arange(
+            1, int((end - start) // self.resolution) + 1
+        )
+        previous = self.link_state(u, v, start)
+        times, links, states = [], [], []
+        for t in steps:
+            state = self.link_state(u, v, t)
+            changed = np.flatnonzero(state != previous)
+            times.append(np.full(len(changed), t))
+            links.append(changed)
+            states.append(state[changed])
+            previous = state
+        if not times:
+            return np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+        return np.concatenate(times), np.concatenate(links), np.concatenate(states)
+
+    def describe(self):
+        return f"contact_plan_period{self.period:g}s_cutoff{self.polar_cutoff:g}deg" + (
+            "_seam" if self.seam else ""
+        )
+
+
+class DynamicTopology:
+    """A CSRTopology whose links go up and down in place as a ContactPlan dictates.
+
+    Every directed CSR slot has an up flag, so a link change flips two
+    flags instead of rebuilding the graph; neighbors() only returns links
+    that are currently up. Changes are applied in time order by advance_to().
+    """
+
+    def __init__(self, topology, contact_plan, start=0.0, horizon=None):
+        self.topology = topology
+        self.contact_plan = contact_plan
+        self.num_nodes = topology.num_nodes
+        u, v = topology.edge_arrays()
+        # Only inter-plane links are subject to the contact windows
+        dynamic = contact_plan.dynamic_links(u, v)
+        self._u, self._v = u[dynamic], v[dynamic]
+        self._slots = (self._slot(self._u, self._v), self._slot(self._v, self._u))
+        self.up = np.ones(len(topology.indices), dtype=bool)
+        self.time = start
+        self._set_links(
+            np.arange(len(self._u)), contact_plan.link_state(self._u, self._v, start)
+        )
+        if horizon is None:
+            horizon = contact_plan.period
+        self._times, self._links, self._states = contact_plan.link_changes(
+            self._u, self._v, start, start + horizon
+        )
+        self._next = 0
+        self.changes_applied = 0
+
+    def _slot(self, src, dst):
+        # Neighbour lists are sorted, so each link's slot is a binary search in its row
+        offsets, indices = self.topology.offsets, self.topology.indices
+        return np.array(
+            [
+                offsets[s] + np.searchsorted(indices[offsets[s] : offsets[s + 1]], d)
+                for s, d in zip(src.tolist(), dst.tolist())
+            ],
+            dtype=np.int64,
+        )
+
+    def _set_links(self, links, states):
+        forward, backward = self._slots
+        self.up[forward[links]] = states
+        self.up[backward[links]] = states
+
+    def next_change_time(self):
+        """Time of the next pending link change, or None once the plan is exhausted."""
+        if self._next >= len(self._times):
+            return None
+        return float(self._times[self._next])
+
+    def down_links(self):
+        """Contact-plan links that are down right now, as (u, v) pairs."""
+        down = np.flatnonzero(~self.up[self._slots[0]])
+        return list(zip(self._u[down].tolist(), self._v[down].tolist()))
+
+    def next_up_time(self, links):
+        """Time of the first pending change that brings one of the (u, v) links up, or None."""
+        u, v = np.array(links, dtype=np.int64).reshape(-1, 2).T
+        # Links are sorted by (u, v) with u < v, so each one is a binary search
+        keys = self._u.astype(np.int64) * self.num_nodes + self._v
+        wanted = np.zeros(len(self._u), dtype=bool)
+        wanted[
+            np.searchsorted(keys, np.minimum(u, v) * self.num_nodes + np.maximum(u, v))
+        ] = True
+        links, states = self._links[self._next :], self._states[self._next :]
+        hits = np.flatnonzero(states & wanted[links])
+        return float(self._times[self._next + hits[0]]) if len(hits) else None
+
+    def advance_to(self, t):
+        """Apply every link change up to time t and return the links that came up as (u, v) pairs."""
+        end = self._next + np.searchsorted(self._times[self._next :], t, side="right")
+        links = self._links[self._next : end]
+        states = self._states[self._next : end]
+        self._set_links(links, states)
+        self._next = end
+        self.time = t
+        self.changes_applied += len(links)
+        # A link that flapped within the batch only counts if it ended up
+        came_up = np.unique(links[states])
+        came_up = came_up[self.up[self._slots[0][came_up]]]
+        return list(zip(self._u[came_up].tolist(), self._v[came_up].tolist()))
+
+    def is_up(self, u, v):
+        """Whether link u-v exists and is currently up."""
+        start, end = self.topology.offsets[u], self.topology.offsets[u + 1]
+        row = self.topology.indices[start:end]
+        pos = np.searchsorted(row, v)
+        return bool(pos < len(row) and row[pos] == v and self.up[start + pos])
+
+    def number_of_nodes(self):
+        return self.num_nodes
+
+    def nodes(self):
+        return range(self.num_nodes)
+
+    def neighbors(self, node):
+        start, end = self.topology.offsets[node], self.topology.offsets[node + 1]
+        row = self.topology.indices[start:end]
+        return row[self.up[start:end]].tolist()
+
+    def degrees(self):
+        src = np.repeat(np.arange(self.num_nodes), np.diff(self.topology.offsets))
+        return np.bincount(src[self.up], minlength=self.num_nodes)
+
+    def snapshot(self):
+        """CSRTopology of the links that are up right now (e.g. for analysis)."""
+        src = np.repeat(np.arange(self.num_nodes), np.diff(self.topology.offsets))
+        return CSRTopology.from_edges(
+            self.num_nodes, src[self.up], self.topology.indices[self.up]
+        )
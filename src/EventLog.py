@@ -0,0 +1,69 @@
+import json, os
+
+EVENTS_FILE = "events.ndjson"
+HEADER_FILE = "experiment_data.json"
+
+
+def unique_output_dir(output_dir):
+    """Create and return output_dir, appending a counter if another run already claimed it."""
+    candidate, suffix = output_dir, 1
+    while True:
+        try:
+            # makedirs without exist_ok claims the folder atomically across processes
+            os.makedirs(candidate)
+            return candidate
+        except FileExistsError:
+            candidate = f"{output_dir}_{suffix}"
+            suffix += 1
+
+
+class EventLogWriter:
+    """Append-only NDJSON sink for per-attempt events, with a small JSON header file alongside.
+
+    Events go to disk as they happen instead of accumulating in memory, and
+    are flushed every `flush_every` events, so a crashed run keeps
+    everything up to the last flush.
+    """
+
+    def __init__(self, output_dir, flush_every=1000):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.flush_every = flush_every
+        self.count = 0
+        self._file = open(os.path.join(output_dir, EVENTS_FILE), "w")
+
+    def write(self, event):
+        self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def flush(self):
+        self._file.flush()
+
+    def write_header(self, header):
+        """Atomically (re)write the header with run metadata and summary metrics."""
+        header = dict(header, events_file=EVENTS_FILE, event_count=self.count)
+        path = os.path.join(self.output_dir, HEADER_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(header, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_events(output_dir):
+    """Stream events back from an experiment folder, skipping a line cut short by a crash."""
+    with open(os.path.join(output_dir, EVENTS_FILE)) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                break
@@ -0,0 +1,56 @@
+import heapq, itertools
+from Clock import SimulatedClock
+
+
+class EventSimulator:
+    """Discrete-event core: a priority queue of timestamped events on a virtual clock."""
+
+    SEND = "send"
+    RECEIVE = "receive"
+    RETRY = "retry"
+    # One relay sending to a set of neighbours at the same instant
+    FANOUT = "fanout"
+    # Push-pull gossip control traffic
+    ADVERTISE = "advertise"
+    PULL = "pull"
+    GOSSIP = "gossip"
+
+    def __init__(self, clock=None):
+        # Share the clock with the CubeSats so token timestamps follow virtual time
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.processed = 0
+        self._queue = []
+        # Tie-breaker so events scheduled for the same instant run in FIFO order
+        self._seq = itertools.count()
+
+    @property
+    def now(self):
+        return self.clock.time()
+
+    def schedule(self, delay, kind, **data):
+        """Schedule an event of the given kind `delay` virtual seconds from now."""
+        if delay < 0:
+            raise ValueError("Cannot schedule an event in the past")
+        heapq.heappush(self._queue, (self.now + delay, next(self._seq), kind, data))
+
+    def pending(self):
+        """Return the number of events still waiting in the queue."""
+        return len(self._queue)
+
+    def run(self, handlers, until=None, before_event=None):
+        """Advance the virtual clock event by event, dispatching each to handlers[kind].
+
+        before_event, if given, is called once the clock has reached an event
+        and before it is dispatched (e.g. to catch the world up to now).
+        """
+        while self._queue:
+            if until is not None and self._queue[0][0] > until:
+                self.clock.advance_to(until)
+                break
+            event_time, _, kind, data = heapq.heappop(self._queue)
+            self.clock.advance_to(event_time)
+            self.processed += 1
+            if before_event is not None:
+                before_event()
+            handlers[kind](**data)
+        return self.now
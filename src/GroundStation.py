@@ -1,4 +1,7 @@
 import hashlib, secrets, hmac
+from tokens import xor_bytes, to_bytes
+from HashChain import HashChain
+from SoftwareUpdate import SoftwareUpdate
 
 
 class GroundStation:
@@ -8,8 +11,10 @@ class GroundStation:
         self.previous_token = None
 
     def compute_hash(self, data):
-        """Compute a SHA256 hash of given data."""
-        return hashlib.sha256(data.encode()).hexdigest()
+        """Compute the raw SHA256 digest of given data (bytes, or str encoded as UTF-8)."""
+        if isinstance(data, str):
+            data = data.encode()
+        return hashlib.sha256(data).digest()
 
     def create_hashchain(self, seed, length):
         """Create a hashchain (i.e. series of token) starting from a seed value for a given length."""
@@ -18,27 +23,68 @@ class GroundStation:
             chain.append(self.compute_hash(chain[-1]))
         return chain
 
+    def create_checkpointed_hashchain(self, seed, length):
+        """Create the same hashchain as create_hashchain, holding only O(log n) checkpoints in memory."""
+        return HashChain(seed, length)
+
     def generate_random_token(self, length):
         """Generate a random token of a provided length."""
         return secrets.token_hex(length)
 
-    def xor_strings(self, s1, s2):
-        """XOR two strings and return the result as a string."""
-        # Ensure both strings are of the same length
-        if len(s1) != len(s2):
-            raise ValueError("Both strings must have the same length")
-
-        # XOR each pair of characters from the two strings
-        result = [chr(ord(a) ^ ord(b)) for a, b in zip(s1, s2)]
-
-        # Convert the list of characters back into a string
-        return "".join(result)
-
     def send_update(self, software_update):
         """Send a software update to the CubeSat."""
+        software_update = SoftwareUpdate.wrap(software_update)
         hmac_obj = hmac.new(
-            self.previous_token.encode(), software_update.encode(), hashlib.sha256
+            to_bytes(self.previous_token), software_update.data, hashlib.sha256
         )
-        transmission_token = self.xor_strings(self.current_token, hmac_obj.hexdigest())
-        # transmission_token = self.xor_strings(self.current_token, hashlib.sha256((software_update + self.previous_token).encode()).hexdigest())
+        transmission_token = xor_bytes(to_bytes(self.current_token), hmac_obj.digest())
         return transmission_token
+
+    def uplink(self, software_update, cubesats):
+        """Seed an update to several CubeSats; one that missed earlier uplinks catches up.
+
+        The transmission token is the same for every in-sync CubeSat, so it is
+        computed once. Returns the CubeSats that accepted the update.
+        """
+        transmission_token = self.send_update(software_update)
+        accepted = []
+        for cubesat in cubesats:
+            # In-sync CubeSats still hold the link this update is keyed with
+            if cubesat.token == to_bytes(self.previous_token):
+                verified = cubesat.receive_update(software_update, transmission_token)
+            else:
+                verified = cubesat.catch_up_update(
+                    software_update,
+                    transmission_token,
+                    self.wrap_previous_token(software_update, cubesat.token),
+                )["verified"]
+            if verified:
+                accepted.append(cubesat)
+        return accepted
+
+    def catch_up_checkpoints(self, hashchain, stale_index, previous_index, interval):
+        """Every `interval`-th link between a CubeSat's stale token and previous_token, nearest the stale token first."""
+        return [
+            hashchain[index]
+            for index in range(stale_index - interval, previous_index, -interval)
+        ]
+
+    def wrap_previous_token(self, software_update, stale_token):
+        """previous_token XOR HMAC(stale_token, update): only the CubeSat holding stale_token can unwrap it.
+
+        previous_token keys this round's update, so sending it in the clear
+        would let anyone who sees the catch-up forge a transmission token.
+        """
+        software_update = SoftwareUpdate.wrap(software_update)
+        key_stream = hmac.new(
+            to_bytes(stale_token), software_update.data, hashlib.sha256
+        ).digest()
+        return xor_bytes(to_bytes(self.previous_token), key_stream)
+
+    def send_catch_up(self, software_update, stale_token, checkpoints=()):
+        """Send an update to a CubeSat that missed earlier ones and still holds stale_token."""
+        return (
+            self.send_update(software_update),
+            self.wrap_previous_token(software_update, stale_token),
+            list(checkpoints),
+        )
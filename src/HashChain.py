@@ -0,0 +1,94 @@
+import hashlib
+
+
+class HashChain:
+    """Hashchain that keeps O(log n) pebbles instead of materialising every link.
+
+    Link 0 is hash(seed) and link i is hash(link i-1), exactly as
+    GroundStation.create_hashchain builds them. Tokens are released from the
+    end of the chain backwards, so the chain is indexed like that list
+    (hashchain[-1], hashchain[-2], ...) while a reverse cursor walks it with
+    recursive halving: amortised O(log n) hashes per step.
+    """
+
+    def __init__(self, seed, length):
+        if length < 1:
+            raise ValueError("Hashchain length must be at least 1")
+        self.seed = seed
+        self.length = length
+        self.hash_count = 0
+        self._anchor = self._hash(seed)
+        self.rewind()
+
+    def _hash(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.hash_count += 1
+        return hashlib.sha256(data).digest()
+
+    def _walk(self, value, steps):
+        """Hash a link forward the given number of steps."""
+        for _ in range(steps):
+            value = self._hash(value)
+        return value
+
+    def rewind(self):
+        """Reset the reverse cursor to just past the end of the chain."""
+        # Each pebble is (start, value at start, end) for a segment not yet released
+        self._pebbles = [(0, self._anchor, self.length)]
+        self._position = self.length
+        self._value = None
+        self._previous = None
+
+    def _step(self):
+        """Move the reverse cursor one link towards the seed and return that link."""
+        if not self._pebbles:
+            raise IndexError("Hashchain exhausted")
+        start, value, end = self._pebbles.pop()
+        while end - start > 1:
+            mid = (start + end) // 2
+            self._pebbles.append((start, value, mid))
+            value = self._walk(value, mid - start)
+            start = mid
+        if self._value is not None:
+            self._previous = (self._position, self._value)
+        self._position, self._value = start, value
+        return value
+
+    def pebble_count(self):
+        """Return the number of checkpoints currently held (at most ~log2(length))."""
+        return len(self._pebbles)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("Hashchain index out of range")
+        if index == self._position:
+            return self._value
+        # Each round reads the new token and the one released before it
+        if self._previous is not None and index == self._previous[0]:
+            return self._previous[1]
+        if index > self._position:
+            # Already released and not cached: recompute from the anchor
+            return self._walk(self._anchor, index)
+        while self._position > index:
+            self._step()
+        return self._value
+
+    def __iter__(self):
+        """Yield links from the seed end, in the same order as the list form."""
+        value = self._anchor
+        yield value
+        for _ in range(self.length - 1):
+            value = self._hash(value)
+            yield value
+
+    def __reversed__(self):
+        """Yield links from the end of the chain back to the seed on an independent cursor."""
+        traversal = HashChain(self.seed, self.length)
+        for _ in range(self.length):
+            yield traversal._step()
@@ -0,0 +1,62 @@
+import random
+
+
+class LinkModel:
+    """Per-hop delay model: random propagation delay plus payload serialisation at the link bandwidth.
+
+    With no bandwidth the payload size is ignored, which reproduces the
+    original normal(5ms, 1ms) per-hop latency. In pipelined mode a relay
+    starts forwarding as soon as the first chunk has arrived (cut-through)
+    instead of waiting for the full image (store-and-forward).
+    """
+
+    def __init__(
+        self,
+        propagation_delay=0.005,
+        delay_std=0.001,
+        bandwidth=None,
+        link_bandwidth=None,
+        chunk_size=64 * 1024,
+        pipelined=False,
+    ):
+        self.propagation_delay = propagation_delay
+        self.delay_std = delay_std
+        # Bits per second; per-link overrides are keyed by (u, v) in either order
+        self.bandwidth = bandwidth
+        self.link_bandwidth = link_bandwidth or {}
+        self.chunk_size = chunk_size
+        self.pipelined = pipelined
+
+    def bandwidth_of(self, u, v):
+        return self.link_bandwidth.get(
+            (u, v), self.link_bandwidth.get((v, u), self.bandwidth)
+        )
+
+    def serialisation_time(self, u, v, size):
+        """Seconds to clock size bytes onto the u-v link."""
+        bandwidth = self.bandwidth_of(u, v)
+        return 0 if bandwidth is None else 8 * size / bandwidth
+
+    def hop(self, u, v, size):
+        """Sample one transmission: (delay until the header and first chunk arrive, delay until the full image arrives)."""
+        delay = max(0, random.normalvariate(self.propagation_delay, self.delay_std))
+        first = delay + self.serialisation_time(u, v, min(size, self.chunk_size))
+        return first, delay + self.serialisation_time(u, v, size)
+
+    def max_first_chunk_time(self, size=None):
+        """Upper bound on hop()'s first delay: +4 std of propagation and the slowest link's first chunk."""
+        chunk = self.chunk_size if size is None else min(size, self.chunk_size)
+        bandwidths = [
+            bw for bw in (self.bandwidth, *self.link_bandwidth.values()) if bw
+        ]
+        serialisation = 8 * chunk / min(bandwidths) if bandwidths else 0
+        return self.propagation_delay + 4 * self.delay_std + serialisation
+
+    def describe(self):
+        if self.bandwidth is None and not self.link_bandwidth:
+            return f"normal_{self.propagation_delay * 1000:g}ms_std{self.delay_std * 1000:g}"
+        mode = "pipelined" if self.pipelined else "store_and_forward"
+        return (
+            f"normal_{self.propagation_delay * 1000:g}ms_std{self.delay_std * 1000:g}"
+            f"_bw{self.bandwidth or 0:g}bps_{mode}"
+        )
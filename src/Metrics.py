@@ -0,0 +1,138 @@
+import math
+
+
+class LatencyHistogram:
+    """Fixed-memory histogram with logarithmic buckets.
+
+    Percentiles are accurate to one bucket width (about 2.3% relative with
+    the default 100 buckets per decade), while min, max and mean are exact.
+    """
+
+    def __init__(self, min_value=1e-6, max_value=1e6, buckets_per_decade=100):
+        self.min_value = min_value
+        self.buckets_per_decade = buckets_per_decade
+        decades = math.log10(max_value / min_value)
+        # Bucket 0 catches values below min_value, the last one values above max_value
+        self.counts = [0] * (math.ceil(decades * buckets_per_decade) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        if value < self.min_value:
+            index = 0
+        else:
+            index = 1 + int(
+                math.log10(value / self.min_value) * self.buckets_per_decade
+            )
+            index = min(index, len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile, clamped to the observed range."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                break
+        upper = self.min_value * 10 ** (index / self.buckets_per_decade)
+        return min(max(upper, self.min), self.max)
+
+
+# First-order radio model: ~50 nJ/bit to transmit plus ~50 nJ/bit to receive
+ENERGY_PER_BIT = 100e-9
+
+
+class MetricsCollector:
+    """Online experiment metrics, updated per attempt and per delivery.
+
+    Memory is fixed apart from the per-receiver attempt counts of the round
+    in progress, which are folded into the redundancy total by end_round().
+    """
+
+    def __init__(self):
+        self.attempts = 0
+        self.retry_sum = 0
+        self.max_retry = 0
+        self.drops = 0
+        self.malicious = 0
+        self.failed_token_attempts = 0
+        self.redundant_transmissions = 0
+        self.max_hops = 0
+        self.messages_sent = 0
+        self.control_messages = 0
+        self.bytes_sent = 0
+        self.latency = LatencyHistogram()
+        self.propagation = LatencyHistogram()
+        self._round_targets = {}
+
+    def record_attempt(self, event):
+        self.attempts += 1
+        self.retry_sum += event["retry"]
+        self.max_retry = max(self.max_retry, event["retry"])
+        self.latency.add(event["latency"])
+        if event["possibly_malicious"]:
+            self.malicious += 1
+        if not event["token_valid"]:
+            self.drops += 1
+            if not event["possibly_malicious"]:
+                self.failed_token_attempts += 1
+        target = (event["receiver"], event["version"])
+        count = self._round_targets.get(target, 0) + 1
+        self._round_targets[target] = count
+        # A target counts as redundant once, the first time it is attempted twice
+        if count == 2:
+            self.redundant_transmissions += 1
+
+    def record_transmission(self, size, control=False):
+        """Count one message put on a link: a full update, or a digest/pull control message."""
+        if control:
+            self.control_messages += 1
+        else:
+            self.messages_sent += 1
+        self.bytes_sent += size
+
+    def record_delivery(self, time_received, hops):
+        self.propagation.add(time_received)
+        self.max_hops = max(self.max_hops, hops)
+
+    def end_round(self):
+        self._round_targets.clear()
+
+    def summary(self):
+        """Metrics in the experiment_data.json field names."""
+        return {
+            "avg_retries_per_event": (
+                self.retry_sum / self.attempts if self.attempts else 0
+            ),
+            "max_retries": self.max_retry,
+            "packet_drop_rate": (
+                100 * self.drops / self.attempts if self.attempts else 0
+            ),
+            "redundant_transmissions": self.redundant_transmissions,
+            "malicious_tokens": self.malicious,
+            "failed_token_attempts": self.failed_token_attempts,
+            "max_propagation_time": (
+                self.propagation.max if self.propagation.count else 0
+            ),
+            "p50_propagation_time": self.propagation.percentile(50),
+            "p95_propagation_time": self.propagation.percentile(95),
+            "p99_propagation_time": self.propagation.percentile(99),
+            "avg_attempt_latency": self.latency.mean(),
+            "max_hops": self.max_hops,
+            "messages_sent": self.messages_sent,
+            "control_messages": self.control_messages,
+            "bytes_sent": self.bytes_sent,
+            "energy_proxy_j": self.bytes_sent * 8 * ENERGY_PER_BIT,
+        }
@@ -0,0 +1,26 @@
+import hashlib
+
+
+class SoftwareUpdate:
+    """Update payload that carries its SHA256 digest, computed once on creation."""
+
+    def __init__(self, payload, version=None):
+        self.payload = payload
+        self.version = version
+        self.data = payload.encode() if isinstance(payload, str) else bytes(payload)
+        self.digest = hashlib.sha256(self.data).hexdigest()
+
+    @classmethod
+    def wrap(cls, software_update):
+        """Accept either a SoftwareUpdate or a raw str/bytes payload."""
+        if isinstance(software_update, cls):
+            return software_update
+        return cls(software_update)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __str__(self):
+        if isinstance(self.payload, str):
+            return self.payload
+        return f"<update {self.digest[:10]}... ({len(self.data)} bytes)>"
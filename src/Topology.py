@@ -0,0 +1,89 @@
+import numpy as np
+import networkx as nx
+
+
+class CSRTopology:
+    """Undirected topology stored as CSR arrays.
+
+    The neighbours of node i are indices[offsets[i]:offsets[i + 1]], so a
+    10k-node constellation costs a few hundred KB instead of networkx's
+    dict-of-dicts. Convert with to_networkx() only when analysis needs it.
+    """
+
+    def __init__(self, num_nodes, offsets, indices):
+        self.num_nodes = num_nodes
+        self.offsets = offsets
+        self.indices = indices
+
+    @classmethod
+    def from_edges(cls, num_nodes, u, v):
+        """Build from endpoint arrays, dropping duplicate links in either direction."""
+        u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+        low, high = np.minimum(u, v), np.maximum(u, v)
+        pairs = np.unique(low * num_nodes + high)
+        low, high = pairs // num_nodes, pairs % num_nodes
+        loops = low == high
+        # Store both directions, but a self-loop only once
+        src = np.concatenate([low, high[~loops]])
+        dst = np.concatenate([high, low[~loops]])
+        order = np.lexsort((dst, src))
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=num_nodes), out=offsets[1:])
+        return cls(num_nodes, offsets, dst[order])
+
+    @classmethod
+    def structured(cls, num_planes, sats_per_plane):
+        """Plane/ring grid of build_structured_topology, generated directly as arrays."""
+        num_nodes = num_planes * sats_per_plane
+        node = np.arange(num_nodes)
+        plane, sat = node // sats_per_plane, node % sats_per_plane
+        # Intra-plane ring and inter-plane links
+        next_sat = plane * sats_per_plane + (sat + 1) % sats_per_plane
+        next_plane = ((plane + 1) % num_planes) * sats_per_plane + sat
+        return cls.from_edges(
+            num_nodes,
+            np.concatenate([node, node]),
+            np.concatenate([next_sat, next_plane]),
+        )
+
+    def number_of_nodes(self):
+        return self.num_nodes
+
+    def number_of_edges(self):
+        return len(self.edges())
+
+    def nodes(self):
+        return range(self.num_nodes)
+
+    def neighbors(self, node):
+        return self.indices[self.offsets[node] : self.offsets[node + 1]].tolist()
+
+    def degrees(self):
+        return np.diff(self.offsets)
+
+    def edge_arrays(self):
+        """Each undirected link once, as (u, v) arrays with u <= v."""
+        src = np.repeat(np.arange(self.num_nodes), self.degrees())
+        keep = src <= self.indices
+        return src[keep], self.indices[keep]
+
+    def edges(self):
+        u, v = self.edge_arrays()
+        return list(zip(u.tolist(), v.tolist()))
+
+    def without_edges(self, edges):
+        """Copy of the topology with the given links (in either direction) removed."""
+        u, v = self.edge_arrays()
+        if len(edges):
+            removed = np.asarray(edges, dtype=np.int64)
+            low = np.minimum(removed[:, 0], removed[:, 1])
+            high = np.maximum(removed[:, 0], removed[:, 1])
+            keep = ~np.isin(u * self.num_nodes + v, low * self.num_nodes + high)
+            u, v = u[keep], v[keep]
+        return CSRTopology.from_edges(self.num_nodes, u, v)
+
+    def to_networkx(self):
+        G = nx.Graph()
+        G.add_nodes_from(range(self.num_nodes))
+        G.add_edges_from(self.edges())
+        return G
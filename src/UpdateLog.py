@@ -0,0 +1,179 @@
+import hashlib, math, secrets, sys
+from collections import deque
+
+
+def version_epoch(version):
+    """Orderable epoch for a version string ("1.10" > "1.9"), or None if it is not dotted numbers."""
+    if version is None:
+        return None
+    try:
+        return tuple(int(part) for part in str(version).split("."))
+    except ValueError:
+        return None
+
+
+class UpdateLog:
+    """Dedup log of the last `window` updates, with constant memory and O(1) lookups.
+
+    Digests are kept in insertion order and the oldest is evicted once more
+    than `window` are held. Updates carry a version; anything at or below
+    the newest evicted version still counts as seen, so an old update
+    replayed after eviction is not accepted again.
+    """
+
+    def __init__(self, window=64):
+        self.window = window
+        self._digests = {}
+        self._order = deque()
+        # Highest epoch pushed out of the window so far
+        self._floor = None
+
+    def add(self, digest, version=None):
+        if digest in self._digests:
+            return
+        epoch = version_epoch(version)
+        self._digests[digest] = epoch
+        self._order.append(digest)
+        if len(self._order) > self.window:
+            evicted_epoch = self._digests.pop(self._order.popleft())
+            if evicted_epoch is not None and (
+                self._floor is None or evicted_epoch > self._floor
+            ):
+                self._floor = evicted_epoch
+
+    def seen(self, digest, version=None):
+        if digest in self._digests:
+            return True
+        epoch = version_epoch(version)
+        return epoch is not None and self._floor is not None and epoch <= self._floor
+
+    def __contains__(self, digest):
+        return self.seen(digest)
+
+    def __len__(self):
+        return len(self._order)
+
+    def clear(self):
+        self._digests.clear()
+        self._order.clear()
+        self._floor = None
+
+
+class BloomUpdateLog:
+    """Probabilistic dedup log: two rotating Bloom filters of `capacity` updates each.
+
+    Each filter is sized for half the target false-positive rate at full
+    capacity, since a lookup checks both; when the current filter is full
+    it becomes the previous one and a fresh filter starts, so memory is
+    fixed and at least the last `capacity` updates are always remembered.
+    A false positive makes a CubeSat treat a new update as already
+    received; measure_false_positive_rate() probes for it.
+    """
+
+    def __init__(self, capacity=1024, false_positive_rate=0.01):
+        self.capacity = capacity
+        self.target_false_positive_rate = false_positive_rate
+        self.num_bits = max(
+            8,
+            math.ceil(-capacity * math.log(false_positive_rate / 2) / math.log(2) ** 2),
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._current = bytearray((self.num_bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._count = 0
+
+    def _positions(self, digest):
+        # Double hashing: k positions from the two 64-bit halves of one (unkeyed) blake2b digest
+        if isinstance(digest, str):
+            digest = digest.encode()
+        raw = hashlib.blake2b(digest, digest_size=16).digest()
+        h1 = int.from_bytes(raw[:8], "big")
+        h2 = int.from_bytes(raw[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _test(bits, positions):
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def add(self, digest, version=None):
+        positions = self._positions(digest)
+        if self._test(self._current, positions):
+            return
+        if self._count >= self.capacity:
+            self._previous, self._current = self._current, self._previous
+            self._current[:] = bytes(len(self._current))
+            self._count = 0
+        for p in positions:
+            self._current[p >> 3] |= 1 << (p & 7)
+        self._count += 1
+
+    def seen(self, digest, version=None):
+        positions = self._positions(digest)
+        return self._test(self._current, positions) or self._test(
+            self._previous, positions
+        )
+
+    def __contains__(self, digest):
+        return self.seen(digest)
+
+    def clear(self):
+        self._current[:] = bytes(len(self._current))
+        self._previous[:] = bytes(len(self._previous))
+        self._count = 0
+
+    def expected_false_positive_rate(self):
+        """Analytic rate for the bits set right now, across both filters."""
+        rates = []
+        for count in (self._count, self.capacity if any(self._previous) else 0):
+            rates.append(
+                (1 - math.exp(-self.num_hashes * count / self.num_bits))
+                ** self.num_hashes
+            )
+        return 1 - (1 - rates[0]) * (1 - rates[1])
+
+    def measure_false_positive_rate(self, trials=100000):
+        """Fraction of fresh random digests the filter wrongly reports as seen."""
+        hits = sum(self.seen(secrets.token_hex(32)) for _ in range(trials))
+        return hits / trials
+
+
+def retained_size(obj, seen=None):
+    """Bytes held by a dedup log and everything it references (shared objects counted once)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(
+            retained_size(k, seen) + retained_size(v, seen) for k, v in obj.items()
+        )
+    elif isinstance(obj, (set, frozenset, list, tuple, deque)):
+        size += sum(retained_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += retained_size(vars(obj), seen)
+    return size
+
+
+if __name__ == "__main__":
+    updates = 5000
+    for name, make in [
+        ("set", set),
+        ("window(64)", lambda: UpdateLog(64)),
+        ("bloom(1024, 1%)", lambda: BloomUpdateLog(1024, 0.01)),
+    ]:
+        log = make()
+        for i in range(updates):
+            digest = hashlib.sha256(str(i).encode()).hexdigest()
+            if isinstance(log, set):
+                log.add(digest)
+            else:
+                log.add(digest, f"1.{i}")
+        line = f"{name:16} {retained_size(log) / 1024:8.1f} KiB per node after {updates} updates"
+        if isinstance(log, BloomUpdateLog):
+            line += (
+                f", false positives {100 * log.measure_false_positive_rate():.2f}% "
+                f"(expected {100 * log.expected_false_positive_rate():.2f}%)"
+            )
+        print(line)
@@ -0,0 +1,107 @@
+import hashlib, hmac, time
+from CubeSat import CubeSat
+from GroundStation import GroundStation
+from SoftwareUpdate import SoftwareUpdate
+from scalability_experiment import build_structured_topology
+
+
+def fresh_hmac(secret, message):
+    """Per-message keying, as CubeSat did before caching the key context."""
+    return hmac.new(secret.encode(), message.encode(), hashlib.sha256).digest()
+
+
+def time_round(sign, links, software_update, ts):
+    """Generate and then verify one token per directed link; return elapsed seconds."""
+    start = time.perf_counter()
+    tokens = [
+        sign(sender, f"{software_update.digest}|{sender}|{rec}|{ts}")
+        for sender, rec in links
+    ]
+    for (sender, rec), token in zip(links, tokens):
+        expected = sign(rec, f"{software_update.digest}|{sender}|{rec}|{ts}")
+        assert hmac.compare_digest(expected, token)
+    return time.perf_counter() - start
+
+
+def time_fanout(cubesats, adjacency, software_update, batched):
+    """Every CubeSat signs a token for each neighbour, then each verifies its burst of incoming copies."""
+    for cubesat in cubesats:
+        cubesat.update_log.clear()
+    start = time.perf_counter()
+    incoming = {node: [] for node in adjacency}
+    for sender, neighbors in adjacency.items():
+        if batched:
+            _, ts, tokens = cubesats[sender].broadcast_update_batch(
+                software_update, neighbors
+            )
+            for rec in neighbors:
+                incoming[rec].append((tokens[rec], sender, ts))
+        else:
+            for rec in neighbors:
+                _, token, _, _, ts = cubesats[sender].broadcast_update(
+                    software_update, rec
+                )
+                incoming[rec].append((token, sender, ts))
+    for rec, burst in incoming.items():
+        if batched:
+            assert True in cubesats[rec].receive_broadcast_batch(software_update, burst)
+        else:
+            accepted = [
+                cubesats[rec].receive_broadcast_update(software_update, *copy)
+                for copy in burst
+            ]
+            assert accepted[0] is not None
+    return time.perf_counter() - start
+
+
+def benchmark_hmac(topology_configs=[(30, 20), (40, 25), (50, 40)], repeats=5):
+    ground_station = GroundStation("GS")
+    shared_secret = ground_station.generate_random_token(32)
+    software_update = SoftwareUpdate("Firmware update v1.3")
+    ts = int(time.time()) + CubeSat.TOKEN_LIFETIME
+
+    for num_planes, sats_per_plane in topology_configs:
+        G = build_structured_topology(num_planes, sats_per_plane)
+        cubesats = [CubeSat(b"\0" * 32, shared_secret) for _ in G.nodes()]
+        for i, cs in enumerate(cubesats):
+            cs.id = i  # Token messages name CubeSats by node index
+        links = [(u, v) for u, v in G.edges()] + [(v, u) for u, v in G.edges()]
+
+        fresh = min(
+            time_round(
+                lambda n, m: fresh_hmac(shared_secret, m), links, software_update, ts
+            )
+            for _ in range(repeats)
+        )
+        cached = min(
+            time_round(
+                lambda n, m: cubesats[n].cluster_hmac(m), links, software_update, ts
+            )
+            for _ in range(repeats)
+        )
+        # Each link is signed once and verified once
+        messages = 2 * len(links)
+        print(
+            f"{G.number_of_nodes()} CubeSats, {len(links)} links: "
+            f"fresh {messages / fresh:,.0f} msg/s, cached {messages / cached:,.0f} msg/s, "
+            f"speed-up {fresh / cached:.2f}x"
+        )
+
+        # The same traffic through the CubeSat API, one call per link vs one per relay/burst
+        adjacency = {node: list(G.neighbors(node)) for node in G.nodes()}
+        per_link = min(
+            time_fanout(cubesats, adjacency, software_update, False)
+            for _ in range(repeats)
+        )
+        batched = min(
+            time_fanout(cubesats, adjacency, software_update, True)
+            for _ in range(repeats)
+        )
+        print(
+            f"  API fan-out: per link {len(links) / per_link:,.0f} links/s, "
+            f"batched {len(links) / batched:,.0f} links/s, speed-up {per_link / batched:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_hmac()
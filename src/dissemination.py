@@ -0,0 +1,112 @@
+import random
+from collections import deque
+
+
+class Flood:
+    """The original protocol: every new holder pushes the update to all of its neighbours."""
+
+    name = "flood"
+    # Push-pull strategies set this to advertise digests instead of pushing everywhere
+    advertises = False
+
+    def prepare(self, G, sources):
+        """Called at the start of each round with the topology as it is then."""
+
+    def forward_to(self, node, sender, G):
+        """Neighbours a new holder pushes the full update to (sender is None for a source)."""
+        return G.neighbors(node)
+
+    def resend_on_link_up(self, holder, waiting):
+        """Whether a holder pushes over a link that just came up to a neighbour without the update."""
+        return True
+
+    def describe(self):
+        return self.name
+
+
+class ProbabilisticForwarding(Flood):
+    """Gossip with forwarding probability p: relays push to each other neighbour with probability p.
+
+    Sources still push to every neighbour so a round cannot die out at the
+    first hop; below p of roughly 0.6 on a degree-4 grid some rounds will not
+    reach every satellite.
+    """
+
+    name = "probabilistic"
+
+    def __init__(self, probability=0.7):
+        self.probability = probability
+
+    def forward_to(self, node, sender, G):
+        if sender is None:
+            return G.neighbors(node)
+        return [
+            neighbor
+            for neighbor in G.neighbors(node)
+            if neighbor != sender and random.random() < self.probability
+        ]
+
+    def describe(self):
+        return f"{self.name}_p{self.probability:g}"
+
+
+class SpanningTreeRelay(Flood):
+    """Relay only along a BFS spanning forest rooted at the sources, one transmission per satellite.
+
+    The forest is rebuilt every round from the links that are up. A link
+    whose retries are all lost cuts off its subtree for that round.
+    """
+
+    name = "spanning_tree"
+
+    def prepare(self, G, sources):
+        self.children = {node: [] for node in G.nodes()}
+        seen = set(sources)
+        queue = deque(sources)
+        while queue:
+            node = queue.popleft()
+            for neighbor in G.neighbors(node):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    self.children[node].append(neighbor)
+                    queue.append(neighbor)
+
+    def forward_to(self, node, sender, G):
+        return self.children[node]
+
+    def resend_on_link_up(self, holder, waiting):
+        return waiting in self.children[holder]
+
+
+class PushPullGossip(Flood):
+    """Push to `fanout` random neighbours, advertise the update's digest to the rest.
+
+    A neighbour checks an advertised digest against its update_log and pulls
+    the update from the first advertiser if it is missing. Holders
+    re-advertise every `period` seconds, up to `max_rounds` times, to the
+    neighbours they have not yet heard the digest from, which repairs lost
+    pushes and pulls without redundant full transfers.
+    """
+
+    name = "push_pull"
+    advertises = True
+
+    def __init__(self, fanout=1, period=0.05, max_rounds=5):
+        self.fanout = fanout
+        self.period = period
+        self.max_rounds = max_rounds
+
+    def forward_to(self, node, sender, G):
+        neighbors = [neighbor for neighbor in G.neighbors(node) if neighbor != sender]
+        return random.sample(neighbors, min(self.fanout, len(neighbors)))
+
+    def describe(self):
+        return f"{self.name}_fanout{self.fanout}"
+
+
+STRATEGIES = {
+    "flood": Flood,
+    "probabilistic": ProbabilisticForwarding,
+    "push_pull": PushPullGossip,
+    "spanning_tree": SpanningTreeRelay,
+}
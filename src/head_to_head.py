@@ -0,0 +1,194 @@
+import csv, os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+from Topology import CSRTopology
+from parallel_sweep import PROTOCOLS, REPO_ROOT, _init_worker
+
+# CSUM-G's per-hop latency (LinkModel defaults) and packet-drop rate, used for the baseline's uplinks too
+LATENCY_S = (0.005, 0.001)
+DROP_PROBABILITY = 0.1
+# Total attempts per transmission on both sides (CSUM-G's max_retries)
+MAX_RETRIES = 3
+LINK_FAILURE = 0.1
+# Longest wait for a CubeSat's next ground pass (the CSUM baseline's load delay)
+MAX_GROUND_PASS_WAIT_S = 24 * 60 * 60
+
+
+def make_scenario(num_planes, sats_per_plane, updates=5, seed=0):
+    """Everything random about one run, drawn once so both protocols face the same conditions.
+
+    That is the failed links, the hashchain seed and shared secret, the
+    simulators' seed, and each CubeSat's wait for a ground pass in every
+    round. The result is a plain dict so it can be handed to either
+    codebase's worker.
+    """
+    rng = np.random.default_rng(seed)
+    topology = CSRTopology.structured(num_planes, sats_per_plane)
+    edges = topology.edges()
+    failed = rng.choice(len(edges), int(len(edges) * LINK_FAILURE), replace=False)
+    return {
+        "num_planes": num_planes,
+        "sats_per_plane": sats_per_plane,
+        "updates": updates,
+        "seed": int(rng.integers(2**32)),
+        "failed_links": [list(edges[i]) for i in sorted(failed.tolist())],
+        "chain_seed": rng.bytes(32).hex(),
+        "shared_secret": rng.bytes(32).hex(),
+        "latency_s": LATENCY_S,
+        "drop_probability": DROP_PROBABILITY,
+        "max_retries": MAX_RETRIES,
+        "load_delay_s": rng.uniform(
+            0, MAX_GROUND_PASS_WAIT_S, (updates, topology.num_nodes)
+        ).tolist(),
+    }
+
+
+def _round_stats(delivered, wait_s, successful, num_nodes):
+    """Reach, mean delivery time and completion time of one round from its delivery times."""
+    times = wait_s + np.asarray(delivered, dtype=float)
+    return {
+        "reach": successful / num_nodes,
+        "avg_time": float(times.mean()) if len(times) else float("nan"),
+        "completion_time": float(times.max()) if len(times) else float("nan"),
+    }
+
+
+def _run_protocol(protocol, scenario):
+    """Run one protocol on a scenario in a worker and return its per-run summary."""
+    num_nodes = scenario["num_planes"] * scenario["sats_per_plane"]
+    load_delay_s = np.asarray(scenario["load_delay_s"])
+    if protocol == "csum-g":
+        from scalability_experiment import scalability_experiment
+
+        details = {}
+        scalability_experiment(scenario=scenario, details=details, node_history=True)
+        data = details[num_nodes]
+        histories = [node["update_history"] for node in data["nodes"].values()]
+        # Propagation starts once the ground station has reached every seeded CubeSat
+        rounds = [
+            _round_stats(
+                [h[r]["time_received"] for h in histories if h[r]["received"]],
+                load_delay_s[r, data["sources"]].max(),
+                data["successful_nodes_per_round"][r],
+                num_nodes,
+            )
+            for r in range(scenario["updates"])
+        ]
+        transmissions = data["uplink_attempts"] + data["messages_sent"]
+    else:
+        from experiment import simulate_scenario
+
+        data = simulate_scenario(scenario)
+        # Event latencies already include each CubeSat's own ground-pass wait;
+        # every round has events, so a round nobody accepted still gets a key
+        delivered = {}
+        for event in data["events"]:
+            times = delivered.setdefault(event["version"], [])
+            if event["token_valid"]:
+                times.append(event["latency"])
+        rounds = [
+            _round_stats(times, 0.0, successful, num_nodes)
+            for times, successful in zip(
+                delivered.values(), data["successful_nodes_per_round"]
+            )
+        ]
+        transmissions = len(data["events"])
+    return {
+        "reach_percent": 100 * float(np.mean([r["reach"] for r in rounds])),
+        "avg_time": float(np.nanmean([r["avg_time"] for r in rounds])),
+        "completion_time": float(np.nanmean([r["completion_time"] for r in rounds])),
+        "transmissions": transmissions,
+        "packet_drop_rate": data["packet_drop_rate"],
+        "avg_retries_per_event": data["avg_retries_per_event"],
+    }
+
+
+def head_to_head(topology_configs, updates=5, base_seed=0, workers=None):
+    """Run CSUM and CSUM-G on the same scenarios and return a paired row per topology.
+
+    Each config gets one scenario from make_scenario(), seeded from a
+    SeedSequence spawned off base_seed. Both protocols run it in their own
+    spawned pool (their modules share names) and write their usual results
+    folders. Ground-station uplinks and inter-satellite links drop with the
+    same probability and get the same number of attempts on both sides.
+    Times include the wait for a ground pass: the baseline waits for every
+    CubeSat's own pass, CSUM-G only for the seeded ones'. Reach is the
+    share of CubeSats that accepted each round's update. The table is
+    printed and saved to results/head_to_head_<timestamp>.csv.
+    """
+    scenarios = [
+        make_scenario(
+            num_planes, sats_per_plane, updates, int(child.generate_state(1)[0])
+        )
+        for (num_planes, sats_per_plane), child in zip(
+            topology_configs,
+            np.random.SeedSequence(base_seed).spawn(len(topology_configs)),
+        )
+    ]
+    pools, futures = [], {}
+    try:
+        for protocol in ("csum", "csum-g"):
+            pool = ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=PROTOCOLS[protocol],
+            )
+            pools.append(pool)
+            futures[protocol] = [
+                pool.submit(_run_protocol, protocol, scenario) for scenario in scenarios
+            ]
+        outcomes = {
+            protocol: [future.result() for future in jobs]
+            for protocol, jobs in futures.items()
+        }
+    finally:
+        for pool in pools:
+            pool.shutdown()
+
+    rows = []
+    for (num_planes, sats_per_plane), csum, csum_g in zip(
+        topology_configs, outcomes["csum"], outcomes["csum-g"]
+    ):
+        row = {
+            "Topology": f"structured_{num_planes}x{sats_per_plane}",
+            "Nodes": num_planes * sats_per_plane,
+        }
+        for label, summary in (("CSUM", csum), ("CSUM-G", csum_g)):
+            row[f"{label} Reach (%)"] = round(summary["reach_percent"], 2)
+            row[f"{label} Avg Time (s)"] = round(summary["avg_time"], 2)
+            row[f"{label} Completion (s)"] = round(summary["completion_time"], 2)
+            row[f"{label} Transmissions"] = summary["transmissions"]
+            row[f"{label} Drop Rate (%)"] = round(summary["packet_drop_rate"], 2)
+            row[f"{label} Avg Retries"] = round(summary["avg_retries_per_event"], 3)
+        row["Completion Speed-up"] = round(
+            csum["completion_time"] / csum_g["completion_time"], 2
+        )
+        rows.append(row)
+
+    output_dir = os.path.join(REPO_ROOT, "results")
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(
+        output_dir, f"head_to_head_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    with open(output_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"\nCSUM vs CSUM-G, {updates} updates per scenario, base seed {base_seed}")
+    for row in rows:
+        print(
+            f"{row['Nodes']} CubeSats: completion {row['CSUM Completion (s)']:.1f}s vs "
+            f"{row['CSUM-G Completion (s)']:.1f}s (x{row['Completion Speed-up']}), "
+            f"reach {row['CSUM Reach (%)']}% vs {row['CSUM-G Reach (%)']}%, "
+            f"transmissions {row['CSUM Transmissions']} vs {row['CSUM-G Transmissions']}"
+        )
+    print(f"Table written to {output_file}")
+    return rows
+
+
+if __name__ == "__main__":
+    head_to_head([(6, 8), (10, 10), (20, 20), (30, 20)])
@@ -8,7 +8,9 @@ def main():
     # Create separate hashchains for each CubeSat
     num_cubesats = 4
     hashchains = [
-        ground_station.create_hashchain(ground_station.generate_random_token(32), 10000)
+        ground_station.create_checkpointed_hashchain(
+            ground_station.generate_random_token(32), 10000
+        )
         for _ in range(num_cubesats)
     ]
 
@@ -20,7 +22,9 @@ def main():
     # cubesats = [CubeSat(token, shared_secret) for token in initial_tokens]
     cubesats = []
     for idx, token in enumerate(initial_tokens):
-        cubesats.append(CubeSat(token, shared_secret, id=idx + 1))
+        cs = CubeSat(token, shared_secret)
+        cs.id = idx + 1
+        cubesats.append(cs)
 
     software_update = "Critical firmware patch v1.3"
 
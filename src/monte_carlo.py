@@ -0,0 +1,226 @@
+import json, os
+import numpy as np
+import networkx as nx
+
+
+def _directed_edges(G, nodes):
+    """Both directions of every link as index arrays, grouped by receiver."""
+    index = {node: i for i, node in enumerate(nodes)}
+    src = [index[u] for u, v in G.edges()] + [index[v] for u, v in G.edges()]
+    dst = [index[v] for u, v in G.edges()] + [index[u] for u, v in G.edges()]
+    src, dst = np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+    order = np.argsort(dst, kind="stable")
+    return src[order], dst[order]
+
+
+def _in_link_table(src, dst, num_nodes):
+    """Padded (node x max in-degree) table of incoming link indices; padding points one past the last link."""
+    num_links = len(src)
+    degree = np.bincount(dst, minlength=num_nodes)
+    table = np.full((num_nodes, max(1, degree.max(initial=0))), num_links)
+    first = np.concatenate([[0], np.cumsum(degree)[:-1]])
+    slot = np.arange(num_links) - first[dst]
+    table[dst, slot] = np.arange(num_links)
+    return table
+
+
+def _first_passage(weight, src, in_links, num_nodes, source):
+    """Earliest arrival and hop count at every node, for a batch of trials at once.
+
+    Flooding forwards on first receipt, so arrival times are shortest paths
+    over the sampled per-link delays; Bellman-Ford relaxation is run on all
+    trials together until nothing improves. Arrays are node-major
+    (links/nodes x trials) so every gather copies whole contiguous rows.
+    """
+    trials = weight.shape[1]
+    # One padding link (infinite delay, from a node that is never reached)
+    weight = np.vstack([weight, np.full((1, trials), np.inf)])
+    link_src = np.append(src, num_nodes)[in_links]
+    link_weight = weight[in_links]
+    dist = np.full((num_nodes + 1, trials), np.inf)
+    hops = np.full((num_nodes + 1, trials), np.inf)
+    dist[source] = 0
+    hops[source] = 0
+    while True:
+        cand = dist[link_src] + link_weight
+        best = cand.min(axis=1)
+        improved = best < dist[:num_nodes]
+        if not improved.any():
+            return dist[:num_nodes], hops[:num_nodes]
+        dist[:num_nodes] = np.minimum(dist[:num_nodes], best)
+        hop_cand = np.where(cand == dist[:num_nodes, None], hops[link_src] + 1, np.inf)
+        hops[:num_nodes] = np.where(improved, hop_cand.min(axis=1), hops[:num_nodes])
+
+
+def monte_carlo_propagation(
+    G,
+    trials=1000,
+    source=0,
+    max_retries=3,
+    drop_rate=0.1,
+    malicious_rate=0.05,
+    latency_mean=0.005,
+    latency_std=0.001,
+    seed=None,
+    batch_size=256,
+):
+    """Batched Monte Carlo of one flooding round per trial, with NumPy draws for every link and trial.
+
+    Mirrors the scalar path in scalability_experiment: a malicious token
+    can only hit the first attempt, drops hit any attempt, retries go out
+    as soon as an attempt fails, and an attempt is only logged if the
+    receiver did not already hold the update when it was sent and when it
+    arrived. The source only learns it "received" the broadcast when a
+    neighbour floods it back, as in the scalar path.
+    """
+    rng = np.random.default_rng(seed)
+    nodes = sorted(G.nodes())
+    num_nodes = len(nodes)
+    source = nodes.index(source)
+    src, dst = _directed_edges(G, nodes)
+    receiver_starts = np.unique(dst, return_index=True)[1]
+    in_links = _in_link_table(src, dst, num_nodes)
+    num_links = len(src)
+    retries = np.arange(max_retries)
+
+    round_times, arrivals, hop_counts = [], [], []
+    attempts = retry_sum = max_retry = drops = malicious = failed = redundant = 0
+    unreachable = 0
+
+    for batch_start in range(0, trials, batch_size):
+        batch = min(batch_size, trials - batch_start)
+        shape = (batch, num_links, max_retries)
+        latency = np.maximum(0, rng.normal(latency_mean, latency_std, shape))
+        is_malicious = rng.random((batch, num_links)) < malicious_rate
+        failed_attempt = rng.random(shape) < drop_rate
+        failed_attempt[:, :, 0] |= is_malicious
+
+        delivered = ~failed_attempt
+        link_ok = delivered.any(axis=2)
+        first_ok = delivered.argmax(axis=2)
+        last_attempt = np.where(link_ok, first_ok, max_retries - 1)
+        # Attempt j reaches the receiver cum[j] after the sender forwarded
+        cum = np.cumsum(latency, axis=2)
+        link_delay = np.where(
+            link_ok, np.take_along_axis(cum, first_ok[..., None], 2)[..., 0], np.inf
+        )
+
+        dist, hops = _first_passage(
+            np.ascontiguousarray(link_delay.T), src, in_links, num_nodes, source
+        )
+        dist, hops = dist.T, hops.T
+        # The source accepts the flood back from its earliest neighbour
+        into_source = dst == source
+        received = dist.copy()
+        received_hops = hops.copy()
+        if into_source.any():
+            back = dist[:, src[into_source]] + link_delay[:, into_source]
+            received[:, source] = back.min(axis=1)
+            best = back.argmin(axis=1)
+            received_hops[:, source] = (
+                hops[:, src[into_source]][np.arange(batch), best] + 1
+            )
+        else:
+            received[:, source] = np.inf
+
+        # Which attempts were actually sent and logged
+        send_time = dist[:, src][..., None]
+        receiver_time = received[:, dst][..., None]
+        sent_at = send_time + np.concatenate(
+            [np.zeros((batch, num_links, 1)), cum[:, :, :-1]], axis=2
+        )
+        logged = (
+            (retries <= last_attempt[..., None])
+            & np.isfinite(send_time)
+            & (sent_at < receiver_time)
+            & (send_time + cum <= receiver_time)
+        )
+
+        attempts += int(logged.sum())
+        retry_sum += int((logged * retries).sum())
+        if logged.any():
+            max_retry = max(max_retry, int(retries[logged.any(axis=(0, 1))].max()))
+        batch_drops = int((logged & failed_attempt).sum())
+        batch_malicious = int((logged[:, :, 0] & is_malicious).sum())
+        drops += batch_drops
+        malicious += batch_malicious
+        failed += batch_drops - batch_malicious
+        # Receivers that saw more than one logged attempt in a trial
+        per_receiver = np.add.reduceat(logged.sum(axis=2), receiver_starts, axis=1)
+        redundant += int((per_receiver > 1).sum())
+
+        reached = np.isfinite(received)
+        unreachable += int((~reached).sum())
+        round_times.append(np.where(reached, received, 0).max(axis=1))
+        arrivals.append(received[reached])
+        hop_counts.append(received_hops[reached])
+
+    round_times = np.concatenate(round_times)
+    arrivals = np.concatenate(arrivals)
+    hop_counts = np.concatenate(hop_counts)
+    return {
+        "trials": trials,
+        "node_count": num_nodes,
+        # Last delivery per trial; the scalar round time also counts trailing failed retries
+        "avg_propagation_time": float(round_times.mean()),
+        "max_propagation_time": float(arrivals.max()) if arrivals.size else 0,
+        "p50_propagation_time": (
+            float(np.percentile(arrivals, 50)) if arrivals.size else 0
+        ),
+        "p95_propagation_time": (
+            float(np.percentile(arrivals, 95)) if arrivals.size else 0
+        ),
+        "p99_propagation_time": (
+            float(np.percentile(arrivals, 99)) if arrivals.size else 0
+        ),
+        "avg_hops": float(hop_counts.mean()) if hop_counts.size else 0,
+        "max_hops": int(hop_counts.max()) if hop_counts.size else 0,
+        "unreachable_percent": 100 * unreachable / (trials * num_nodes),
+        "avg_retries_per_event": retry_sum / attempts if attempts else 0,
+        "max_retries": max_retry,
+        "packet_drop_rate": 100 * drops / attempts if attempts else 0,
+        "attempts_per_round": attempts / trials,
+        "redundant_transmissions_per_round": redundant / trials,
+        "malicious_tokens_per_round": malicious / trials,
+        "failed_token_attempts_per_round": failed / trials,
+    }
+
+
+def cross_check(output_dir, trials=2000, seed=None):
+    """Re-run a scalar experiment's topology through the batched path and print both sets of metrics.
+
+    The experiment must have been run with node_history=True, so its header has the per-node history.
+    """
+    with open(os.path.join(output_dir, "experiment_data.json")) as f:
+        data = json.load(f)
+    G = nx.Graph()
+    G.add_nodes_from(range(data["node_count"]))
+    G.add_edges_from(data["edges"])
+    batched = monte_carlo_propagation(G, trials, seed=seed)
+
+    rounds = data["update_rounds"]
+    history = [h for node in data["nodes"].values() for h in node["update_history"]]
+    times = [h["time_received"] for h in history if h["received"]]
+    hops = [h["hops"] for h in history if h["received"]]
+    scalar = {
+        "avg_retries_per_event": data["avg_retries_per_event"],
+        "packet_drop_rate": data["packet_drop_rate"],
+        "max_propagation_time": data["max_propagation_time"],
+        "p50_propagation_time": float(np.percentile(times, 50)) if times else 0,
+        "avg_hops": float(np.mean(hops)) if hops else 0,
+        "max_hops": max(hops) if hops else 0,
+        "unreachable_percent": 100
+        * sum(1 for h in history if not h["received"])
+        / len(history),
+        "redundant_transmissions_per_round": data["redundant_transmissions"] / rounds,
+    }
+    if "malicious_tokens" in data:
+        scalar["malicious_tokens_per_round"] = data["malicious_tokens"] / rounds
+        scalar["failed_token_attempts_per_round"] = (
+            data["failed_token_attempts"] / rounds
+        )
+
+    print(f"{'metric':36} {'scalar':>12} {'batched':>12}")
+    for key, value in scalar.items():
+        print(f"{key:36} {value:12.4f} {batched[key]:12.4f}")
+    return scalar, batched
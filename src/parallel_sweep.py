@@ -0,0 +1,108 @@
+import math, os, sys
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Where each protocol's modules live and where its results/ folder is written
+PROTOCOLS = {
+    "csum-g": (os.path.join(REPO_ROOT, "src"), REPO_ROOT),
+    "csum": (os.path.join(REPO_ROOT, "CSUM", "src"), os.path.join(REPO_ROOT, "CSUM")),
+}
+
+
+def _init_worker(source_dir, output_root):
+    # Both protocols ship modules named CubeSat/GroundStation, so each pool
+    # gets fresh (spawned) interpreters pointed at one codebase only
+    sys.path.insert(0, source_dir)
+    os.chdir(output_root)
+
+
+def _run_job(protocol, config, updates, seed):
+    if protocol == "csum-g":
+        from scalability_experiment import scalability_experiment
+
+        results = scalability_experiment([config], updates, seed=seed)
+    else:
+        from experiment import simulate_updates_vectorized
+
+        results = simulate_updates_vectorized([config], updates, seed=seed)
+    return next(iter(results.values()))
+
+
+def parallel_sweep(
+    topology_configs,
+    trials=1,
+    updates=5,
+    protocol="csum-g",
+    base_seed=0,
+    workers=None,
+):
+    """Run every (config, trial) of a sweep on a process pool with its own reproducible seed.
+
+    Seeds come from one SeedSequence spawned per job, so a job's outcome only
+    depends on base_seed and its position in the sweep, not on scheduling.
+    Each job writes its usual results/exp_* folder.
+    """
+    source_dir, output_root = PROTOCOLS[protocol]
+    jobs = [(config, trial) for config in topology_configs for trial in range(trials)]
+    seeds = [
+        int(child.generate_state(1)[0])
+        for child in np.random.SeedSequence(base_seed).spawn(len(jobs))
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(source_dir, output_root),
+    ) as pool:
+        futures = [
+            pool.submit(_run_job, protocol, config, updates, seed)
+            for (config, _), seed in zip(jobs, seeds)
+        ]
+        times = [future.result() for future in futures]
+
+    summary = {}
+    for (config, _), avg_time in zip(jobs, times):
+        summary.setdefault(config[0] * config[1], []).append(avg_time)
+
+    print(f"\n{protocol} sweep: {len(jobs)} runs, base seed {base_seed}")
+    for num_cubesats, samples in sorted(summary.items()):
+        mean = float(np.mean(samples))
+        # 95% confidence half-width under a normal approximation
+        half_width = (
+            1.96 * float(np.std(samples, ddof=1)) / math.sqrt(len(samples))
+            if len(samples) > 1
+            else 0.0
+        )
+        summary[num_cubesats] = {
+            "mean": mean,
+            "ci95": half_width,
+            "trials": len(samples),
+        }
+        print(
+            f"{num_cubesats} CubeSats: Avg propagation time {mean:.6f} ± {half_width:.6f} sec over {len(samples)} trials"
+        )
+    return summary
+
+
+if __name__ == "__main__":
+    configs = [
+        (2, 3),
+        (3, 4),
+        (4, 5),
+        (4, 12),
+        (6, 8),
+        (7, 7),
+        (6, 10),
+        (9, 9),
+        (10, 10),
+        (11, 11),
+        (15, 15),
+        (20, 20),
+        (25, 20),
+        (30, 20),
+    ]
+    parallel_sweep(configs, trials=10, protocol="csum-g")
+    parallel_sweep(configs, trials=10, protocol="csum")
@@ -0,0 +1,56 @@
+import numpy as np
+from topology_analysis import bfs_distances
+
+
+def single_source(topology, num_planes, sats_per_plane, k=None):
+    """The original setup: the ground station only reaches CubeSat 0."""
+    return [0]
+
+
+def one_per_plane(topology, num_planes, sats_per_plane, k=None):
+    """One satellite per plane, staggered along the rings so they do not all sit at one latitude."""
+    return [
+        plane * sats_per_plane + (plane * sats_per_plane // num_planes)
+        for plane in range(num_planes)
+    ]
+
+
+def k_center(topology, num_planes, sats_per_plane, k=None):
+    """Greedy farthest-first k-center by hop distance, starting from CubeSat 0.
+
+    Each pick is the satellite farthest from every pick so far, which is
+    within a factor of two of the best possible max distance to a source.
+    Unreachable satellites count as infinitely far, so every connected
+    component gets a source first. k defaults to one per plane.
+    """
+    if k is None:
+        k = num_planes
+    k = min(k, topology.num_nodes)
+    centers = [0]
+    nearest = bfs_distances(topology, 0).astype(float)
+    nearest[nearest < 0] = np.inf
+    while len(centers) < k:
+        center = int(np.argmax(nearest))
+        if nearest[center] == 0:
+            break  # every satellite is already a source
+        centers.append(center)
+        dist = bfs_distances(topology, center).astype(float)
+        dist[dist < 0] = np.inf
+        np.minimum(nearest, dist, out=nearest)
+    return centers
+
+
+PLACEMENTS = {
+    "single": single_source,
+    "per_plane": one_per_plane,
+    "k_center": k_center,
+}
+
+
+def injection_points(strategy, topology, num_planes, sats_per_plane, k=None):
+    """Satellites the ground station uplinks to each round, chosen by the named strategy."""
+    if strategy not in PLACEMENTS:
+        raise ValueError(
+            f"Unknown placement strategy {strategy!r}, expected one of {sorted(PLACEMENTS)}"
+        )
+    return PLACEMENTS[strategy](topology, num_planes, sats_per_plane, k)
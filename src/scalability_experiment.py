@@ -1,12 +1,26 @@
-import time, hashlib, random
+import time, hashlib, math, random
+from collections import defaultdict
 import networkx as nx
 from CubeSat import CubeSat
 from GroundStation import GroundStation
+from EventSimulator import EventSimulator
+from Clock import SimulatedClock
+from SoftwareUpdate import SoftwareUpdate
+from LinkModel import LinkModel
+from EventLog import EventLogWriter, unique_output_dir
+from ColumnarStore import convert_experiment
+from ClusterState import ClusterState
+from Metrics import MetricsCollector
+from Topology import CSRTopology
+from DynamicTopology import ContactPlan, DynamicTopology
+from placement import injection_points
+from dissemination import STRATEGIES, Flood
+from topology_analysis import analyze
 
-import json
-import os
 from datetime import datetime
-from collections import Counter
+
+# Digest advertisement or pull request: 32-byte digest plus ids and timestamp
+CONTROL_MESSAGE_SIZE = 64
 
 
 def build_structured_topology(num_planes, sats_per_plane):
@@ -26,7 +40,360 @@ def build_structured_topology(num_planes, sats_per_plane):
     return G
 
 
-def scalability_experiment(topology_configs=[(6, 8), (10, 10), (12, 12)], updates=5):
+def propagate_update(
+    G,
+    cubesats,
+    software_update,
+    version,
+    experiment_data,
+    clock,
+    max_retries=3,
+    link_model=None,
+    update_size=None,
+    event_log=None,
+    metrics=None,
+    max_wait=None,
+    sources=(0,),
+    strategy=None,
+    state=None,
+):
+    """Flood one update from the seeded CubeSats (sources) on a virtual clock and return the round's completion time.
+
+    On a DynamicTopology, link changes are applied as the clock reaches
+    each event; sends over a link that is down are held until it comes back
+    up, for at most max_wait seconds after the round starts. Once nothing
+    else is queued the clock only jumps ahead to a contact that releases a
+    held send, so a round ends as soon as it has no work left. strategy (see
+    dissemination.py) decides which neighbours each new holder pushes to;
+    push-pull strategies also advertise the digest and serve pulls.
+    Arrival times and hop counts go to state (a ClusterState whose round
+    is already started); without one they are discarded.
+    """
+    if link_model is None:
+        link_model = LinkModel()
+    if strategy is None:
+        strategy = Flood()
+    if update_size is None:
+        update_size = len(software_update)
+    sim = EventSimulator(clock)
+    start = clock.time()
+    if state is None:
+        state = ClusterState(G.number_of_nodes(), 1)
+        state.start_round(software_update)
+    # Stream attempts to disk when a writer is given, else keep them in experiment_data
+    record_event = (
+        event_log.write if event_log is not None else experiment_data["events"].append
+    )
+    # Time each CubeSat holds the full image; a pipelined relay can't finish before its sender
+    complete = {source: start for source in sources}
+    dynamic = isinstance(G, DynamicTopology)
+    last_activity = start
+    # Push-pull state: neighbours each holder knows to hold the update, and open pulls
+    known = defaultdict(set)
+    pending_pull = {}
+
+    def on_send(sender_id, neighbor_id, retry_count):
+        nonlocal last_activity
+        last_activity = sim.now
+        if dynamic and not G.is_up(sender_id, neighbor_id):
+            return  # Resent by resend() once the contact window reopens
+        receiver = cubesats[neighbor_id]
+        if receiver.has_received(software_update):
+            return  # Step 4: Already received
+
+        # Step 3: Create and send token
+        update, token, sid, rid, ts = cubesats[sender_id].broadcast_update(
+            software_update, neighbor_id
+        )
+        transmit(sender_id, neighbor_id, retry_count, update, token, ts)
+
+    def on_fanout(sender_id, targets):
+        nonlocal last_activity
+        last_activity = sim.now
+        targets = [
+            neighbor_id
+            for neighbor_id in targets
+            if not (dynamic and not G.is_up(sender_id, neighbor_id))
+            and not cubesats[neighbor_id].has_received(software_update)
+        ]
+        if not targets:
+            return
+        # One call signs the whole neighbour set
+        update, ts, tokens = cubesats[sender_id].broadcast_update_batch(
+            software_update, targets
+        )
+        for neighbor_id in targets:
+            transmit(sender_id, neighbor_id, 0, update, tokens[neighbor_id], ts)
+
+    def transmit(sender_id, neighbor_id, retry_count, update, token, ts):
+        # The token rides in the header, so it is verified once the first chunk lands
+        latency, full = link_model.hop(sender_id, neighbor_id, update_size)
+        if metrics is not None:
+            metrics.record_transmission(update_size)
+        sim.schedule(
+            latency,
+            EventSimulator.RECEIVE,
+            sender_id=sender_id,
+            neighbor_id=neighbor_id,
+            retry_count=retry_count,
+            update=update,
+            token=token,
+            ts=ts,
+            latency=latency,
+            complete_at=max(sim.now + full, complete[sender_id] + latency),
+        )
+
+    def on_receive(
+        sender_id, neighbor_id, retry_count, update, token, ts, latency, complete_at
+    ):
+        nonlocal last_activity
+        last_activity = sim.now
+        # Step 5: Receiver verifies and may rebroadcast
+        receiver = cubesats[neighbor_id]
+        if receiver.has_received(software_update):
+            return  # Step 4: Already received over a faster path while in flight
+
+        # Simulate malicious token with 5 percent probability
+        is_possibly_malicious = random.random() < 0.05 and retry_count == 0
+        if is_possibly_malicious:
+            fake_token = hashlib.sha256(str(random.random()).encode()).digest()
+            token_func = receiver.receive_broadcast_update(
+                update, fake_token, sender_id, ts
+            )
+        # Simulate packet drop with 10% probability
+        elif random.random() < 0.1:
+            token_func = None  # packet dropped
+        else:
+            try:
+                token_func = receiver.receive_broadcast_update(
+                    update, token, sender_id, ts
+                )
+            except ValueError:
+                # The token expired on the way (e.g. a slow first chunk): a failed attempt
+                token_func = None
+        # Log each attempt
+        event = {
+            "timestamp": sim.now,
+            "sender": sender_id,
+            "receiver": neighbor_id,
+            "latency": latency,
+            "token_valid": token_func is not None,
+            "version": f"{version:.1f}",
+            "retry": retry_count,
+            "possibly_malicious": is_possibly_malicious,
+        }
+        record_event(event)
+        if metrics is not None:
+            metrics.record_attempt(event)
+
+        if token_func:
+            complete[neighbor_id] = complete_at
+            sender_hops = state.hops_now(sender_id)
+            hops = (sender_hops + 1) if sender_hops is not None else 1
+            state.record(neighbor_id, complete_at - start, hops)
+            if metrics is not None:
+                metrics.record_delivery(complete_at - start, hops)
+            # Delivery is acknowledged, so both ends know the other holds the update
+            known[sender_id].add(neighbor_id)
+            known[neighbor_id].add(sender_id)
+            pending_pull.pop(neighbor_id, None)
+            # Store-and-forward relays wait for the full image, pipelined ones don't
+            forward_delay = 0 if link_model.pipelined else complete_at - sim.now
+            pushed = strategy.forward_to(neighbor_id, sender_id, G)
+            if pushed:
+                sim.schedule(
+                    forward_delay,
+                    EventSimulator.FANOUT,
+                    sender_id=neighbor_id,
+                    targets=pushed,
+                )
+            if strategy.advertises:
+                advertise(neighbor_id, strategy.max_rounds, skip=pushed)
+        elif retry_count + 1 < max_retries:
+            sim.schedule(
+                0,
+                EventSimulator.RETRY,
+                sender_id=sender_id,
+                neighbor_id=neighbor_id,
+                retry_count=retry_count + 1,
+            )
+        elif pending_pull.get(neighbor_id) == sender_id:
+            # The pull failed for good; the next advertisement starts a new one
+            del pending_pull[neighbor_id]
+
+    def send_control(kind, sender_id, neighbor_id):
+        if dynamic and not G.is_up(sender_id, neighbor_id):
+            return
+        if metrics is not None:
+            metrics.record_transmission(CONTROL_MESSAGE_SIZE, control=True)
+        latency, _ = link_model.hop(sender_id, neighbor_id, CONTROL_MESSAGE_SIZE)
+        sim.schedule(latency, kind, sender_id=sender_id, neighbor_id=neighbor_id)
+
+    def advertise(holder, rounds_left, skip=()):
+        targets = [
+            neighbor
+            for neighbor in G.neighbors(holder)
+            if neighbor not in known[holder] and neighbor not in skip
+        ]
+        for neighbor_id in targets:
+            send_control(EventSimulator.ADVERTISE, holder, neighbor_id)
+        # Re-advertise later to whoever has not shown they hold the update
+        if rounds_left and len(known[holder]) < len(G.neighbors(holder)):
+            sim.schedule(
+                strategy.period,
+                EventSimulator.GOSSIP,
+                holder=holder,
+                rounds_left=rounds_left - 1,
+            )
+
+    def on_gossip(holder, rounds_left):
+        advertise(holder, rounds_left)
+
+    def on_advertise(sender_id, neighbor_id):
+        if random.random() < 0.1:
+            return  # Digest lost; the next advertisement round repairs it
+        known[neighbor_id].add(sender_id)
+        # The digest is checked against the receiver's update_log
+        if cubesats[neighbor_id].has_received(software_update):
+            return
+        if neighbor_id not in pending_pull:
+            pending_pull[neighbor_id] = sender_id
+            send_control(EventSimulator.PULL, neighbor_id, sender_id)
+
+    def on_pull(sender_id, neighbor_id):
+        if random.random() < 0.1:
+            if pending_pull.get(sender_id) == neighbor_id:
+                del pending_pull[sender_id]
+            return
+        delay = 0 if link_model.pipelined else complete[neighbor_id] - sim.now
+        sim.schedule(
+            max(0, delay),
+            EventSimulator.SEND,
+            sender_id=neighbor_id,
+            neighbor_id=sender_id,
+            retry_count=0,
+        )
+
+    def holds_send(holder, waiting):
+        # A holder pushes over a link once it is up to a neighbour still without the update
+        return (
+            holder in complete
+            and not cubesats[waiting].has_received(software_update)
+            and strategy.resend_on_link_up(holder, waiting)
+        )
+
+    def resend(came_up):
+        for u, v in came_up:
+            for holder, waiting in ((u, v), (v, u)):
+                if holds_send(holder, waiting):
+                    delay = 0 if link_model.pipelined else complete[holder] - sim.now
+                    sim.schedule(
+                        max(0, delay),
+                        EventSimulator.SEND,
+                        sender_id=holder,
+                        neighbor_id=waiting,
+                        retry_count=0,
+                    )
+
+    def link_limit(t):
+        return t if max_wait is None else min(t, start + max_wait)
+
+    def apply_link_changes():
+        # Contact windows catch up with the clock before each event, never past max_wait
+        next_time = G.next_change_time()
+        if next_time is not None and next_time <= link_limit(sim.now):
+            resend(G.advance_to(link_limit(sim.now)))
+
+    def wait_for_link():
+        """With the queue empty, jump to the next contact that releases a held send; False if none will."""
+        held = [
+            (u, v) for u, v in G.down_links() if holds_send(u, v) or holds_send(v, u)
+        ]
+        next_time = G.next_up_time(held) if held else None
+        if next_time is None or next_time > link_limit(next_time):
+            return False
+        clock.advance_to(next_time)
+        resend(G.advance_to(next_time))
+        return True
+
+    if dynamic:
+        G.advance_to(start)
+    strategy.prepare(G, sources)
+    # The seeded CubeSats hold the update from the uplink, at hop 0
+    for source in sources:
+        state.record(source, 0, 0)
+    for source in sources:
+        pushed = strategy.forward_to(source, None, G)
+        if pushed:
+            sim.schedule(0, EventSimulator.FANOUT, sender_id=source, targets=pushed)
+        if strategy.advertises:
+            advertise(source, strategy.max_rounds, skip=pushed)
+
+    handlers = {
+        EventSimulator.SEND: on_send,
+        EventSimulator.RETRY: on_send,
+        EventSimulator.FANOUT: on_fanout,
+        EventSimulator.RECEIVE: on_receive,
+        EventSimulator.ADVERTISE: on_advertise,
+        EventSimulator.PULL: on_pull,
+        EventSimulator.GOSSIP: on_gossip,
+    }
+    while True:
+        sim.run(handlers, before_event=apply_link_changes if dynamic else None)
+        if not (dynamic and wait_for_link()):
+            break
+    if metrics is not None:
+        metrics.end_round()
+    return max([last_activity, *complete.values()]) - start
+
+
+def scalability_experiment(
+    topology_configs=[(6, 8), (10, 10), (12, 12)],
+    updates=5,
+    link_model=None,
+    update_size=None,
+    seed=None,
+    diameter_max_bfs=None,
+    columnar=False,
+    contact_plan=None,
+    round_interval=0.0,
+    placement="single",
+    num_sources=None,
+    details=None,
+    dissemination="flood",
+    update_log=None,
+    compact_state=False,
+    scenario=None,
+    node_history=False,
+):
+    """Run the flooding experiment per topology; contact_plan (ContactPlan keyword
+    arguments, {} for the defaults) switches to a time-varying topology with
+    round_interval seconds of orbit between rounds. placement picks the
+    CubeSats the ground station uplinks to each round (see placement.py).
+    dissemination is a strategy name from dissemination.STRATEGIES or an
+    instance. update_log is a zero-argument factory for each CubeSat's dedup
+    log (e.g. lambda: BloomUpdateLog(1024)). compact_state keeps the CubeSats
+    as one ClusterState of arrays instead of objects. The header holds no
+    per-node data, so it stays small for any constellation size: columnar
+    stores the (node x round) history as arrays, and node_history adds the
+    old per-node "nodes" entry (neighbours and update_history) to the
+    header for small runs. If details is a dict, each run's experiment_data is stored in it by node
+    count. scenario (a head_to_head.make_scenario() dict) replaces the
+    configs, updates and seed and fixes the failed links, hashchain seed,
+    shared secret and link latency, and makes the ground station's uplinks
+    drop like the baseline's, so the CSUM baseline can run the same one."""
+    if scenario is not None:
+        topology_configs = [(scenario["num_planes"], scenario["sats_per_plane"])]
+        updates, seed = scenario["updates"], scenario["seed"]
+        if link_model is None:
+            link_model = LinkModel(*scenario["latency_s"])
+    if link_model is None:
+        link_model = LinkModel()
+    if seed is not None:
+        random.seed(seed)
+    strategy = (
+        STRATEGIES[dissemination]() if isinstance(dissemination, str) else dissemination
+    )
     results = {}
     for num_planes, sats_per_plane in topology_configs:
         num_cubesats = num_planes * sats_per_plane
@@ -37,223 +404,295 @@ def scalability_experiment(topology_configs=[(6, 8), (10, 10), (12, 12)], update
             "timestamp": datetime.now().isoformat(),
             "node_count": num_cubesats,
             "update_rounds": updates,
-            "latency_model": "normal_5ms_std1_with_10_percent_link_failure_and_packet_drop",
+            "latency_model": f"{link_model.describe()}_with_10_percent_link_failure_and_packet_drop",
+            "update_size_bytes": update_size,
+            "seed": seed,
             "topology_type": f"structured_{num_planes}x{sats_per_plane}",
             "edges": [],
-            "nodes": {},
-            "events": [],
             "successful_nodes_per_round": [],
         }
+        output_dir = unique_output_dir(
+            f"results/exp_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{num_cubesats}nodes"
+        )
+        event_log = EventLogWriter(output_dir)
+        metrics = MetricsCollector()
         ground_station = GroundStation("GS")
-        shared_secret = ground_station.generate_random_token(32)
+        shared_secret = (
+            scenario["shared_secret"]
+            if scenario is not None
+            else ground_station.generate_random_token(32)
+        )
 
         # Create one shared hashchain for all CubeSats
-        hashchain = ground_station.create_hashchain(
-            ground_station.generate_random_token(32), updates + 1
+        hashchain = ground_station.create_checkpointed_hashchain(
+            (
+                scenario["chain_seed"]
+                if scenario is not None
+                else ground_station.generate_random_token(32)
+            ),
+            updates + 1,
         )
         initial_token = hashchain[-1]
-        cubesats = []
-        for i in range(num_cubesats):
-            cs = CubeSat(initial_token, shared_secret)
-            cs.id = i  # Force CubeSat.id to match index
-            cubesats.append(cs)
+        # Virtual clock shared by the simulator and every CubeSat's token timestamps
+        clock = SimulatedClock(time.time())
+        # Broadcast tokens are checked when the first chunk lands, so they must
+        # outlive the slowest link's first chunk (their ts is in whole seconds)
+        token_lifetime = max(
+            CubeSat.TOKEN_LIFETIME,
+            math.ceil(link_model.max_first_chunk_time(update_size)) + 1,
+        )
+        experiment_data["token_lifetime"] = token_lifetime
+        if compact_state:
+            # CubeSats are views over arrays, built on demand by cubesats[i]
+            cubesats = state = ClusterState(
+                num_cubesats, updates, hashchain, shared_secret, clock
+            )
+            state.token_lifetime = token_lifetime
+        else:
+            cubesats = []
+            for i in range(num_cubesats):
+                cs = CubeSat(
+                    initial_token,
+                    shared_secret,
+                    clock=clock,
+                    update_log=update_log() if update_log is not None else None,
+                )
+                cs.id = i  # Force CubeSat.id to match index
+                cs.TOKEN_LIFETIME = token_lifetime
+                cubesats.append(cs)
+            state = ClusterState(num_cubesats, updates)
 
         # Create a  graph
-        G = build_structured_topology(num_planes, sats_per_plane)
-        total_edges = list(G.edges())
-        num_to_remove = int(len(total_edges) * 0.1)
-        failed_links = random.sample(total_edges, num_to_remove)
-        G.remove_edges_from(failed_links)
+        G = CSRTopology.structured(num_planes, sats_per_plane)
+        if scenario is not None:
+            failed_links = [tuple(edge) for edge in scenario["failed_links"]]
+        else:
+            total_edges = G.edges()
+            num_to_remove = int(len(total_edges) * 0.1)
+            failed_links = random.sample(total_edges, num_to_remove)
+        G = G.without_edges(failed_links)
         experiment_data["disabled_edges"] = failed_links
-        experiment_data["edges"] = list(G.edges())
-
-        experiment_data["avg_node_degree"] = (
-            sum(dict(G.degree()).values()) / G.number_of_nodes()
-        )
-        experiment_data["graph_diameter"] = (
-            nx.diameter(G) if nx.is_connected(G) else None
-        )
-        experiment_data["isolated_nodes"] = [n for n, d in G.degree() if d == 0]
+        experiment_data["edges"] = G.edges()
+
+        degrees = G.degrees()
+        experiment_data["avg_node_degree"] = float(degrees.sum()) / G.number_of_nodes()
+        analysis = analyze(G, max_bfs=diameter_max_bfs)
+        experiment_data["graph_diameter"] = analysis["diameter"]
+        if diameter_max_bfs is not None:
+            experiment_data["graph_diameter_bounds"] = analysis["diameter_bounds"]
+        experiment_data["isolated_nodes"] = analysis["isolated_nodes"]
         experiment_data["num_isolated"] = len(experiment_data["isolated_nodes"])
-        experiment_data["is_connected"] = nx.is_connected(G)
-        for node in G.nodes():
-            experiment_data["nodes"][node] = {
-                "neighbors": list(G.neighbors(node)),
-                "update_history": [],
+        experiment_data["is_connected"] = analysis["is_connected"]
+        if node_history:
+            experiment_data["nodes"] = {
+                node: {"neighbors": list(G.neighbors(node)), "update_history": []}
+                for node in G.nodes()
             }
+        # Injection points are placed on the static grid and kept for every round
+        sources = injection_points(
+            placement, G, num_planes, sats_per_plane, num_sources
+        )
+        experiment_data["placement"] = placement
+        experiment_data["dissemination"] = strategy.describe()
+        experiment_data["update_log"] = (
+            "ClusterState" if compact_state else type(cubesats[0].update_log).__name__
+        )
+        experiment_data["sources"] = sources
+        if scenario is not None:
+            experiment_data["uplink_attempts"] = 0
+        if contact_plan is not None:
+            # Inter-plane links now follow contact windows; the analysis above is of the full grid
+            plan = ContactPlan(num_planes, sats_per_plane, **contact_plan)
+            G = DynamicTopology(
+                G,
+                plan,
+                start=clock.time(),
+                horizon=updates * (round_interval + plan.period),
+            )
+            experiment_data["contact_plan"] = plan.describe()
+            experiment_data["round_interval"] = round_interval
+        # Header goes out before the rounds so a crashed run still has its metadata
+        event_log.write_header(experiment_data)
 
         total_time = 0
 
         for update_idx in range(updates):
+            if update_idx:
+                clock.advance(round_interval)
             # Set version and software update string BEFORE sending
             version = 1.3 + update_idx * 0.1
-            software_update = f"Firmware update v{version:.1f}"
+            software_update = SoftwareUpdate(
+                f"Firmware update v{version:.1f}", version=f"{version:.1f}"
+            )
             max_retries = 3
             # Reset per-update state
-            for node_id in experiment_data["nodes"]:
-                experiment_data["nodes"][node_id]["update_history"].append(
-                    {"received": False, "time_received": None, "hops": None}
-                )
+            state.start_round(software_update)
 
             ground_station.current_token = hashchain[-(update_idx + 2)]
             ground_station.previous_token = hashchain[-(update_idx + 1)]
-            transmission_token = ground_station.send_update(software_update)
-
-            # Step 1 & 2: One CubeSat receives update and stores it
-            cubesats[0].receive_update(software_update, transmission_token)
-
-            # Step 3 to 5: Begin propagation from the initial CubeSat
-            visited = set()
-            queue = [0]
-            start = time.time()
-            experiment_data["start_time"] = start
-
-            while queue:
-                next_queue = []
-                for sender_id in queue:
-                    sender = cubesats[sender_id]
-                    for neighbor_id in G.neighbors(sender_id):
-                        receiver = cubesats[neighbor_id]
-
-                        if (
-                            hashlib.sha256(software_update.encode()).hexdigest()
-                            in receiver.update_log
-                        ):
-                            continue  # Step 4: Already received
-
-                        # Step 3: Create and send token
-                        update, token, sid, rid, ts = sender.broadcast_update(
-                            software_update, neighbor_id
-                        )
-
-                        # Step 5: Receiver verifies and may rebroadcast
-                        retry_count = 0
-                        token_func = None
-
-                        while retry_count < max_retries:
-                            latency = max(0, random.normalvariate(0.005, 0.001))
-                            time.sleep(latency)  # Simulate 1-10ms dynamic latency
-
-                            # Simulate malicious token with 5 percent probability
-                            is_possibly_malicious = (
-                                random.random() < 0.05 and retry_count == 0
-                            )
-                            if is_possibly_malicious:
-                                fake_token = hashlib.sha256(
-                                    str(random.random()).encode()
-                                ).hexdigest()
-                                token_func = receiver.receive_broadcast_update(
-                                    update, fake_token, sid, ts
-                                )
-                            # Simulate packet drop with 10% probability
-                            elif random.random() < 0.1:
-                                token_func = None  # packet dropped
-                            else:
-                                token_func = receiver.receive_broadcast_update(
-                                    update, token, sid, ts
-                                )
-                            # Log each attempt
-                            experiment_data["events"].append(
-                                {
-                                    "timestamp": time.time(),
-                                    "sender": sender_id,
-                                    "receiver": neighbor_id,
-                                    "latency": latency,
-                                    "token_valid": token_func is not None,
-                                    "version": f"{version:.1f}",
-                                    "retry": retry_count,
-                                    "possibly_malicious": is_possibly_malicious,
-                                }
-                            )
-
-                            if token_func:
-                                break
-                            retry_count += 1
-
-                        if token_func:
-                            sender_hops = experiment_data["nodes"][sender_id][
-                                "update_history"
-                            ][-1]["hops"]
-                            experiment_data["nodes"][neighbor_id]["update_history"][
-                                -1
-                            ] = {
-                                "received": True,
-                                "time_received": time.time() - start,
-                                "hops": (
-                                    (sender_hops + 1) if sender_hops is not None else 1
-                                ),
-                            }
-                            next_queue.append(neighbor_id)
-                queue = next_queue
-
-            successful_nodes_this_round = sum(
-                1
-                for node in experiment_data["nodes"].values()
-                if node["update_history"][-1]["received"]
+            reached = sources
+            if scenario is not None:
+                # The scenario's uplinks are as lossy as the baseline's: max_retries attempts each
+                reached = []
+                for source in sources:
+                    for _ in range(scenario["max_retries"]):
+                        experiment_data["uplink_attempts"] += 1
+                        if random.random() >= scenario["drop_probability"]:
+                            reached.append(source)
+                            break
+            # Step 1 & 2: The seeded CubeSats receive the update and store it
+            seeded = ground_station.uplink(
+                software_update, [cubesats[source] for source in reached]
             )
-            experiment_data["successful_nodes_per_round"].append(
-                successful_nodes_this_round
+
+            # Step 3 to 5: Begin propagation from the seeded CubeSats
+            experiment_data["start_time"] = clock.time()
+            round_time = propagate_update(
+                G,
+                cubesats,
+                software_update,
+                version,
+                experiment_data,
+                clock,
+                max_retries,
+                link_model,
+                update_size,
+                event_log,
+                metrics,
+                sources=[cubesat.id for cubesat in seeded],
+                strategy=strategy,
+                state=state,
             )
 
-            end = time.time()
-            total_time += end - start
+            experiment_data["successful_nodes_per_round"].append(state.successful())
+
+            total_time += round_time
+            event_log.flush()
 
+        event_log.close()
+        if contact_plan is not None:
+            experiment_data["link_changes"] = G.changes_applied
         avg_time_per_update = total_time / updates
         results[num_cubesats] = avg_time_per_update
         experiment_data["avg_propagation_time"] = avg_time_per_update
 
         # Unreachable nodes (%)
-        total_nodes = len(experiment_data["nodes"])
-        unreachable = sum(
-            1
-            for node in experiment_data["nodes"].values()
-            if not node["update_history"][-1]["received"]
-        )
-        experiment_data["unreachable_percent"] = 100 * unreachable / total_nodes
-
-        # Retry stats
-        retries = [e["retry"] for e in experiment_data["events"]]
-        experiment_data["avg_retries_per_event"] = (
-            sum(retries) / len(retries) if retries else 0
-        )
-        experiment_data["max_retries"] = max(retries) if retries else 0
-
-        # Packet drop rate
-        drops = sum(1 for e in experiment_data["events"] if not e["token_valid"])
-        experiment_data["packet_drop_rate"] = (
-            100 * drops / len(experiment_data["events"])
-            if experiment_data["events"]
-            else 0
-        )
+        unreachable = num_cubesats - state.successful()
+        experiment_data["unreachable_percent"] = 100 * unreachable / num_cubesats
+        if node_history:
+            for node, entry in experiment_data["nodes"].items():
+                entry["update_history"] = state.update_history(node)
 
-        # Redundancy rate
-        target_counts = Counter(
-            (e["receiver"], e["version"]) for e in experiment_data["events"]
-        )
-        redundant_attempts = sum(
-            1 for (_, v), count in target_counts.items() if count > 1
-        )
-        experiment_data["redundant_transmissions"] = redundant_attempts
-
-        # Max propagation time
-        times = [
-            h["time_received"]
-            for node in experiment_data["nodes"].values()
-            for h in node["update_history"]
-            if h["time_received"] is not None
-        ]
-        experiment_data["max_propagation_time"] = max(times) if times else 0
+        # Retry, drop, redundancy and propagation-time stats, aggregated during the run
+        experiment_data.update(metrics.summary())
 
-        output_dir = f"results/exp_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{num_cubesats}nodes"
-        os.makedirs(output_dir, exist_ok=True)
-        with open(os.path.join(output_dir, "experiment_data.json"), "w") as f:
-            json.dump(experiment_data, f, indent=2)
+        event_log.write_header(experiment_data)
+        if columnar:
+            convert_experiment(output_dir, state.history_arrays())
+        if details is not None:
+            details[num_cubesats] = experiment_data
 
         print(
             f"{num_cubesats} CubeSats: Avg propagation time: {avg_time_per_update:.6f} sec. Data saved to {output_dir}"
         )
 
     print("Final scalability results:", results)
+    return results
+
+
+def compare_relay_modes(
+    topology_configs=[(6, 8), (10, 10), (20, 20)],
+    updates=5,
+    update_size=100 * 1024 * 1024,
+    bandwidth=100e6,
+    chunk_size=64 * 1024,
+):
+    """Run the same sweep store-and-forward and pipelined, and print the speed-up of pipelining."""
+    store_and_forward = scalability_experiment(
+        topology_configs,
+        updates,
+        LinkModel(bandwidth=bandwidth, chunk_size=chunk_size),
+        update_size,
+    )
+    pipelined = scalability_experiment(
+        topology_configs,
+        updates,
+        LinkModel(bandwidth=bandwidth, chunk_size=chunk_size, pipelined=True),
+        update_size,
+    )
+    for num_cubesats in store_and_forward:
+        print(
+            f"{num_cubesats} CubeSats: store-and-forward {store_and_forward[num_cubesats]:.3f} sec, "
+            f"pipelined {pipelined[num_cubesats]:.3f} sec, "
+            f"speed-up {store_and_forward[num_cubesats] / pipelined[num_cubesats]:.1f}x"
+        )
+
+
+def compare_placements(
+    topology_configs=[(6, 8), (10, 10), (20, 30)],
+    updates=5,
+    placements=("per_plane", "k_center"),
+    num_sources=None,
+    seed=0,
+):
+    """Run each placement against the single-source baseline on the same seed and print the drop in max hops and time."""
+    runs = {}
+    for placement in ("single", *placements):
+        details = {}
+        scalability_experiment(
+            topology_configs,
+            updates,
+            seed=seed,
+            placement=placement,
+            num_sources=num_sources,
+            details=details,
+        )
+        runs[placement] = details
+    for num_cubesats, baseline in runs["single"].items():
+        for placement in placements:
+            data = runs[placement][num_cubesats]
+            print(
+                f"{num_cubesats} CubeSats, {placement} ({len(data['sources'])} sources): "
+                f"max hops {baseline['max_hops']} -> {data['max_hops']}, "
+                f"avg time {baseline['avg_propagation_time']:.4f} -> {data['avg_propagation_time']:.4f} sec "
+                f"({100 * (1 - data['avg_propagation_time'] / baseline['avg_propagation_time']):.0f}% less)"
+            )
+    return runs
+
+
+def compare_strategies(
+    topology_configs=[(6, 8), (10, 10), (20, 30)],
+    updates=5,
+    strategies=("flood", "probabilistic", "push_pull", "spanning_tree"),
+    update_size=1024 * 1024,
+    seed=0,
+):
+    """Run each dissemination strategy on the same seed and print its message count, energy proxy, time and reach."""
+    runs = {}
+    for strategy in strategies:
+        details = {}
+        scalability_experiment(
+            topology_configs,
+            updates,
+            update_size=update_size,
+            seed=seed,
+            details=details,
+            dissemination=strategy,
+        )
+        runs[strategy] = details
+    for num_cubesats in runs[strategies[0]]:
+        print(f"\n{num_cubesats} CubeSats, per round:")
+        for strategy, details in runs.items():
+            data = details[num_cubesats]
+            rounds = data["update_rounds"]
+            print(
+                f"  {data['dissemination']:22} updates sent {data['messages_sent'] / rounds:8.1f}, "
+                f"control {data['control_messages'] / rounds:8.1f}, "
+                f"energy {data['energy_proxy_j'] / rounds:7.3f} J, "
+                f"time {data['avg_propagation_time']:.4f} sec, "
+                f"reach {100 - data['unreachable_percent']:.1f}%"
+            )
+    return runs
 
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+"""Helpers for the raw 32-byte tokens used by the protocol core, plus hex compatibility."""
+
+TOKEN_SIZE = 32
+
+
+def xor_bytes(b1, b2):
+    """XOR two equal-length byte strings as whole integers."""
+    if len(b1) != len(b2):
+        raise ValueError("Both tokens must have the same length")
+    return (int.from_bytes(b1, "big") ^ int.from_bytes(b2, "big")).to_bytes(
+        len(b1), "big"
+    )
+
+
+def to_bytes(token):
+    """Accept a token as raw bytes or as a legacy hex string and return raw bytes."""
+    if isinstance(token, str):
+        return bytes.fromhex(token)
+    return bytes(token)
+
+
+def to_hex(token):
+    """Render a raw token as hex for JSON output and logging."""
+    if isinstance(token, str):
+        return token
+    return token.hex()
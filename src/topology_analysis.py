@@ -0,0 +1,186 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+# Results per CSR layout; a topology with failed links removed has its own arrays
+_CACHE_SIZE = 128
+_cache = OrderedDict()
+
+
+def bfs_distances(topology, source):
+    """Hop distance from source to every node (-1 if unreachable), one frontier at a time."""
+    offsets, indices = topology.offsets, topology.indices
+    degrees = np.diff(offsets)
+    dist = np.full(topology.num_nodes, -1, dtype=np.int64)
+    dist[source] = 0
+    frontier = np.array([source])
+    level = 0
+    while frontier.size:
+        level += 1
+        counts = degrees[frontier]
+        total = counts.sum()
+        if not total:
+            break
+        # Flat positions of every frontier node's neighbour slice in `indices`
+        ends = np.cumsum(counts)
+        positions = np.arange(total) + np.repeat(
+            offsets[frontier] - (ends - counts), counts
+        )
+        neighbors = indices[positions]
+        neighbors = np.unique(neighbors[dist[neighbors] < 0])
+        dist[neighbors] = level
+        frontier = neighbors
+    return dist
+
+
+def _neighbor_table(topology):
+    """Padded (node x max degree) neighbour table; padding points at an extra, never-reached node."""
+    degrees = np.diff(topology.offsets)
+    table = np.full(
+        (topology.num_nodes, max(1, degrees.max(initial=0))), topology.num_nodes
+    )
+    slot = np.arange(len(topology.indices)) - np.repeat(topology.offsets[:-1], degrees)
+    table[np.repeat(np.arange(topology.num_nodes), degrees), slot] = topology.indices
+    return table
+
+
+def eccentricities(topology, sources, words=32):
+    """Exact eccentricities of many sources at once with bit-parallel BFS.
+
+    Each node keeps a bitmask of the sources that have reached it, 64
+    sources per machine word, so one level of BFS for `64 * words` sources
+    is a single gather-and-OR over the neighbour table.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    table = _neighbor_table(topology)
+    ecc = np.zeros(len(sources), dtype=np.int64)
+    bits = np.uint64(1) << np.arange(64, dtype=np.uint64)
+    for batch_start in range(0, len(sources), 64 * words):
+        batch = sources[batch_start : batch_start + 64 * words]
+        batch_words = -(-len(batch) // 64)
+        reach = np.zeros((topology.num_nodes + 1, batch_words), dtype=np.uint64)
+        position = np.arange(len(batch))
+        np.bitwise_or.at(reach, (batch, position // 64), bits[position % 64])
+        level = 0
+        while True:
+            grown = np.bitwise_or.reduce(reach[table], axis=1) | reach[:-1]
+            new = grown & ~reach[:-1]
+            expanding = np.bitwise_or.reduce(new, axis=0)
+            if not expanding.any():
+                break
+            level += 1
+            reach[:-1] = grown
+            # Sources that reached a new node at this level have eccentricity >= level
+            still = (expanding[position // 64] & bits[position % 64]) != 0
+            ecc[batch_start + position[still]] = level
+    return ecc
+
+
+def connectivity(topology):
+    """Component count, connectivity and isolated nodes in a single pass over the nodes."""
+    degrees = np.diff(topology.offsets)
+    labels = np.full(topology.num_nodes, -1, dtype=np.int64)
+    isolated = np.flatnonzero(degrees == 0)
+    labels[isolated] = np.arange(len(isolated))
+    components = len(isolated)
+    largest = 1 if len(isolated) else 0
+    for node in range(topology.num_nodes):
+        if labels[node] >= 0:
+            continue
+        reached = bfs_distances(topology, node) >= 0
+        labels[reached] = components
+        components += 1
+        largest = max(largest, int(reached.sum()))
+    return {
+        "is_connected": components <= 1,
+        "num_components": components,
+        "largest_component": largest,
+        "isolated_nodes": isolated.tolist(),
+    }
+
+
+def diameter_bounds(topology, max_bfs=None, prune_runs=16):
+    """Lower and upper diameter bounds of a connected topology by pruned eccentricity search.
+
+    Bounding-diameters (Takes & Kosters): each BFS gives one exact
+    eccentricity and tightens the eccentricity bounds of every other node;
+    nodes whose bounds can no longer move either diameter bound are dropped.
+    With max_bfs it stops after that many BFS runs and the bounds may be
+    apart. Otherwise, after prune_runs single BFS runs, any candidates left
+    (many in near-symmetric grids) get exact eccentricities from the
+    bit-parallel BFS, so the result is exact.
+    """
+    n = topology.num_nodes
+    ecc_lower = np.zeros(n, dtype=np.int64)
+    ecc_upper = np.full(n, np.iinfo(np.int64).max)
+    candidates = np.ones(n, dtype=bool)
+    degrees = np.diff(topology.offsets)
+    lower, upper = 0, np.iinfo(np.int64).max
+    pick_high = True
+    runs = 0
+    while lower < upper and candidates.any():
+        if max_bfs is not None and runs >= max_bfs:
+            break
+        if max_bfs is None and runs >= prune_runs:
+            # Only nodes that could still beat the lower bound matter
+            remaining = np.flatnonzero(candidates & (ecc_upper > lower))
+            if remaining.size:
+                lower = max(lower, int(eccentricities(topology, remaining).max()))
+            return lower, lower
+        pool = np.flatnonzero(candidates)
+        if pick_high:
+            # Largest upper bound, highest degree on ties
+            v = pool[np.lexsort((-degrees[pool], -ecc_upper[pool]))[0]]
+        else:
+            v = pool[np.lexsort((-degrees[pool], ecc_lower[pool]))[0]]
+        pick_high = not pick_high
+        dist = bfs_distances(topology, v)
+        runs += 1
+        ecc = int(dist.max())
+        lower = max(lower, ecc)
+        upper = min(upper, 2 * ecc)
+        ecc_lower = np.maximum(ecc_lower, np.maximum(ecc - dist, dist))
+        ecc_upper = np.minimum(ecc_upper, ecc + dist)
+        upper = min(upper, int(ecc_upper.max()))
+        candidates[v] = False
+        candidates &= ~(
+            ((ecc_upper <= lower) & (2 * ecc_lower >= upper)) | (ecc_lower == ecc_upper)
+        )
+    if not candidates.any():
+        upper = lower
+    return lower, upper
+
+
+def diameter(topology):
+    lower, upper = diameter_bounds(topology)
+    return lower
+
+
+def _cache_key(topology):
+    digest = hashlib.sha1(topology.offsets.tobytes())
+    digest.update(topology.indices.tobytes())
+    return digest.hexdigest()
+
+
+def analyze(topology, max_bfs=None):
+    """Connectivity, isolated nodes and diameter (None if disconnected), cached per layout.
+
+    With max_bfs the diameter is the best lower bound found within that many
+    BFS runs and diameter_bounds reports how tight it is.
+    """
+    key = (_cache_key(topology), max_bfs)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    result = connectivity(topology)
+    if result["is_connected"] and topology.num_nodes:
+        lower, upper = diameter_bounds(topology, max_bfs)
+        result["diameter"] = lower
+        result["diameter_bounds"] = (lower, upper)
+    else:
+        result["diameter"] = None
+        result["diameter_bounds"] = None
+    _cache[key] = result
+    if len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
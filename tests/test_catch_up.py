@@ -0,0 +1,99 @@
+import hashlib, hmac, os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from CubeSat import CubeSat
+from GroundStation import GroundStation
+from tokens import xor_bytes
+
+
+def _setup(updates=6):
+    ground_station = GroundStation("GS")
+    hashchain = ground_station.create_hashchain("seed", updates + 1)
+    return ground_station, hashchain, "secret"
+
+
+def _start_round(ground_station, hashchain, round_index):
+    ground_station.current_token = hashchain[-(round_index + 2)]
+    ground_station.previous_token = hashchain[-(round_index + 1)]
+
+
+def test_stale_cubesat_catches_up():
+    ground_station, hashchain, secret = _setup()
+    cubesat = CubeSat(hashchain[-1], secret)
+    _start_round(ground_station, hashchain, 3)
+    tx, wrapped, checkpoints = ground_station.send_catch_up("v1.6", cubesat.token)
+    report = cubesat.catch_up_update("v1.6", tx, wrapped, checkpoints)
+    assert report["verified"]
+    assert cubesat.token == hashchain[-5]
+
+
+def test_in_sync_cubesat_catches_up_without_hashing():
+    ground_station, hashchain, secret = _setup()
+    cubesat = CubeSat(hashchain[-1], secret)
+    _start_round(ground_station, hashchain, 0)
+    tx, wrapped, _ = ground_station.send_catch_up("v1.3", cubesat.token)
+    report = cubesat.catch_up_update("v1.3", tx, wrapped)
+    assert report["verified"]
+    # Only the final receive_update hashes
+    assert report["hash_count"] == 1
+
+
+def test_catch_up_message_does_not_allow_forgery():
+    ground_station, hashchain, secret = _setup()
+    stale = CubeSat(hashchain[-1], secret)
+    in_sync = CubeSat(hashchain[-3], secret)
+    _start_round(ground_station, hashchain, 2)
+    tx, wrapped, _ = ground_station.send_catch_up("v1.5", stale.token)
+
+    # Treat the wrapped token as the round key, as if it were sent in the clear
+    current = xor_bytes(tx, hmac.new(wrapped, b"v1.5", hashlib.sha256).digest())
+    forged = xor_bytes(current, hmac.new(wrapped, b"EVIL", hashlib.sha256).digest())
+    assert not in_sync.receive_update("EVIL", forged)
+    assert not stale.catch_up_update("EVIL", forged, wrapped)["verified"]
+    assert stale.token == hashchain[-1]
+
+
+def _checkpointed_catch_up(gap=12, interval=4):
+    ground_station, hashchain, secret = _setup(updates=20)
+    stale_index = len(hashchain) - 1
+    _start_round(ground_station, hashchain, gap)
+    checkpoints = ground_station.catch_up_checkpoints(
+        hashchain, stale_index, stale_index - gap, interval
+    )
+    cubesat = CubeSat(hashchain[stale_index], secret)
+    return ground_station, hashchain, cubesat, checkpoints
+
+
+def test_checkpoints_bound_the_hash_count():
+    ground_station, hashchain, cubesat, checkpoints = _checkpointed_catch_up()
+    assert checkpoints == [hashchain[-5], hashchain[-9]]
+    tx, wrapped, checkpoints = ground_station.send_catch_up(
+        "v2.5", cubesat.token, checkpoints
+    )
+    report = cubesat.catch_up_update("v2.5", tx, wrapped, checkpoints, max_steps=12)
+    assert report["verified"]
+    # 12 links to previous_token, then one for the new token
+    assert report["hash_count"] == 13
+    assert cubesat.token == hashchain[-14]
+
+
+def test_interrupted_catch_up_keeps_adopted_checkpoints():
+    ground_station, hashchain, cubesat, checkpoints = _checkpointed_catch_up()
+    tx, wrapped, checkpoints = ground_station.send_catch_up(
+        "v2.5", cubesat.token, checkpoints
+    )
+    report = cubesat.catch_up_update("v2.5", tx, wrapped, checkpoints, max_steps=6)
+    assert not report["verified"]
+    # The first checkpoint verified within max_steps and is kept
+    assert report["steps"] == 4
+    assert cubesat.token == hashchain[-5]
+
+    # The next catch-up starts from there and only walks the rest of the gap
+    tx, wrapped, checkpoints = ground_station.send_catch_up(
+        "v2.5", cubesat.token, checkpoints[1:]
+    )
+    report = cubesat.catch_up_update("v2.5", tx, wrapped, checkpoints, max_steps=8)
+    assert report["verified"]
+    assert report["hash_count"] == 9
+    assert cubesat.token == hashchain[-14]